@@ -1,13 +1,101 @@
-from collections import defaultdict, deque
-from typing import List
+from array import array
+from collections import deque
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+from algorithm_templates import CSRGraph
 
-def possibleBipartition(n: int, dislikes: List[List[int]]) -> bool:
+
+class BipartiteChecker:
+    """Online bipartiteness over a stream of dislike pairs, via union-find with
+    parity: par[x] is 1 when x sits on the other side from its parent. Nodes are
+    added on first sight, so n is only a sizing hint. After the first conflict
+    (an edge joining two people already forced onto the same side) the graph
+    stays non-bipartite and that edge is kept in self.conflict."""
+
+    def __init__(self, n: int = 0):
+        self.p = array('i', range(n))
+        self.par = bytearray(n)
+        self.rank = bytearray(n)
+        self.conflict: Optional[Tuple[int, int]] = None
+
+    def _grow(self, x: int) -> None:
+        n = len(self.p)
+        self.p.extend(range(n, x + 1))
+        self.par.extend(bytes(x + 1 - n))
+        self.rank.extend(bytes(x + 1 - n))
+
+    def _find(self, x: int) -> Tuple[int, int]:
+        """(root, side of x relative to the root), halving the path on the way."""
+        p, par = self.p, self.par
+        side = 0
+        while p[x] != x:
+            up = p[x]
+            par[x] ^= par[up]  # now relative to the grandparent
+            p[x] = p[up]
+            side ^= par[x]
+            x = p[x]
+        return x, side
+
+    def add_dislike(self, u: int, v: int) -> bool:
+        """Record that u and v must be split; False once the graph is not bipartite."""
+        if self.conflict is not None:
+            return False
+        if max(u, v) >= len(self.p):
+            self._grow(max(u, v))
+        ru, su = self._find(u)
+        rv, sv = self._find(v)
+        if ru == rv:
+            if su == sv:
+                self.conflict = (u, v)
+                return False
+            return True
+        if self.rank[ru] < self.rank[rv]:
+            ru, rv = rv, ru
+        self.p[rv] = ru
+        self.par[rv] = su ^ sv ^ 1
+        if self.rank[ru] == self.rank[rv]:
+            self.rank[ru] += 1
+        return True
+
+    def add_many(self, pairs: Iterable[Sequence[int]]) -> bool:
+        """Bulk mode: add_dislike over pairs, stopping at the first conflict.
+        Same steps as add_dislike with the finds inlined."""
+        if self.conflict is not None:
+            return False
+        p, par, rank = self.p, self.par, self.rank
+        for u, v in pairs:
+            if u >= len(p) or v >= len(p):
+                self._grow(max(u, v))
+            x, su = u, 0
+            while p[x] != x:
+                up = p[x]; par[x] ^= par[up]; p[x] = p[up]; su ^= par[x]; x = p[x]
+            y, sv = v, 0
+            while p[y] != y:
+                up = p[y]; par[y] ^= par[up]; p[y] = p[up]; sv ^= par[y]; y = p[y]
+            if x == y:
+                if su == sv:
+                    self.conflict = (u, v)
+                    return False
+                continue
+            if rank[x] < rank[y]:
+                x, y = y, x
+            p[y] = x
+            par[y] = su ^ sv ^ 1
+            if rank[x] == rank[y]:
+                rank[x] += 1
+        return True
+
+    def side(self, x: int) -> int:
+        """0 or 1: a valid 2-coloring of everything added so far (while bipartite)."""
+        return self._find(x)[1] if x < len(self.p) else 0
+
+def possibleBipartition(n: int, dislikes: Union[List[List[int]], CSRGraph]) -> bool:
+    # dislikes may be a CSRGraph over nodes 0..n holding both directions of every pair
+    # a list of pairs goes through the parity union-find, with no adjacency built
     if n == 1:
         return True
-    graph = defaultdict(list)
-    for (u, v) in dislikes:
-        graph[u].append(v)
-        graph[v].append(u)
+    if not isinstance(dislikes, CSRGraph):
+        return BipartiteChecker(n + 1).add_many(dislikes)
+    graph = dislikes.successors
 
     color = [-1] * (n + 1)
     for person in range(1, n + 1):
@@ -17,7 +105,7 @@ def possibleBipartition(n: int, dislikes: List[List[int]]) -> bool:
 
             while queue:
                 u = queue.popleft()
-                for v in graph[u]:
+                for v in graph(u):
                     if color[v] == color[u]:
                         return False
                     if color[v] == -1:
@@ -26,7 +114,77 @@ def possibleBipartition(n: int, dislikes: List[List[int]]) -> bool:
     return True
 
 
-if __name__ == "__main__":
+def bipartition(n: int, dislikes: Union[List[List[int]], CSRGraph]) -> Tuple[bool, Union[bytearray, List[int]]]:
+    """One BFS over a CSR adjacency of nodes 0..n (list input is converted first).
+    Returns (True, color) with color[x] in {0, 1} for x in 1..n, or (False, cycle)
+    where cycle is an odd cycle of people, each disliking the next and the last
+    disliking the first. Uses 9 bytes per node: color, BFS parent and queue."""
+    g = dislikes if isinstance(dislikes, CSRGraph) else \
+        CSRGraph.from_edges(n + 1, [(u, v) for u, v in dislikes] + [(v, u) for u, v in dislikes])
+    offsets, targets = g.offsets, g.targets
+    color = bytearray(b'\xff') * (n + 1)  # 255 = not reached yet
+    parent = array('i', [0]) * (n + 1)
+    queue = array('i', [0]) * (n + 1)  # every node is enqueued once
+    tail = 0
+    for s in range(1, n + 1):
+        if color[s] != 255:
+            continue
+        color[s], parent[s] = 0, s
+        head, queue[tail] = tail, s
+        tail += 1
+        while head < tail:
+            u = queue[head]; head += 1
+            cu = color[u]
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                cv = color[v]
+                if cv == 255:
+                    color[v], parent[v] = cu ^ 1, u
+                    queue[tail] = v; tail += 1
+                elif cv == cu:
+                    # same color means same BFS depth: climb both sides to their common ancestor
+                    left, right = [u], [v]
+                    while u != v:
+                        u, v = parent[u], parent[v]
+                        left.append(u); right.append(v)
+                    return False, left + right[-2::-1]
+    color[0] = 0
+    return True, color
+
+def benchmark_bipartite(n: int = 1_000_000, m: int = 2_000_000) -> None:
+    """Bulk parity union-find and the CSR bipartition against the dict-of-lists
+    BFS, on a random bipartite dislike list (so none of them stops early)"""
+    import random, time
+    from collections import defaultdict
+    rng = random.Random(0)
+    pairs = [(2 * rng.randrange(1, n // 2), 2 * rng.randrange(n // 2) + 1) for _ in range(m)]
+    start = time.perf_counter()
+    adj = defaultdict(list)
+    for u, v in pairs:
+        adj[u].append(v); adj[v].append(u)
+    color = [-1] * (n + 1)
+    for s in range(1, n + 1):
+        if color[s] == -1:
+            color[s], queue = 0, deque([s])
+            while queue:
+                u = queue.popleft()
+                for v in adj[u]:
+                    if color[v] == -1:
+                        color[v] = 1 - color[u]; queue.append(v)
+    t_bfs = time.perf_counter() - start
+    start = time.perf_counter()
+    assert possibleBipartition(n, pairs)
+    t_dsu = time.perf_counter() - start
+    csr = CSRGraph.from_edges(n + 1, pairs + [(v, u) for u, v in pairs])
+    start = time.perf_counter()
+    ok, color = bipartition(n, csr)
+    t_csr = time.perf_counter() - start
+    assert ok and all(color[u] != color[v] for u, v in pairs[:1000])
+    print(f"n={n} m={m}: dict BFS {t_bfs:.2f}s, parity union-find {t_dsu:.2f}s, "
+          f"CSR bipartition with coloring {t_csr:.2f}s ({9 * (n + 1) / 2**20:.0f} MiB working set)")
+
+
+if __name__ == "__main__":  # pass --bench to also run benchmark_bipartite
     # Test cases
     tests = [
         # (n, dislikes, expected)
@@ -40,3 +198,38 @@ if __name__ == "__main__":
     for i, (n, dislikes, expected) in enumerate(tests, 1):
         result = possibleBipartition(n, dislikes)
         print(f"Test case {i}: possibleBipartition({n}, {dislikes}) = {result} (expected: {expected}) -> {'PASS' if result == expected else 'FAIL'}")
+        csr = CSRGraph.from_edges(n + 1, [(u, v) for u, v in dislikes] + [(v, u) for u, v in dislikes])
+        assert possibleBipartition(n, csr) == expected, f"CSR test case {i} failed"
+
+    checker = BipartiteChecker()
+    stream = [(1, 2), (3, 4), (2, 3), (1, 4), (5, 1), (4, 5), (6, 7)]
+    results = [checker.add_dislike(u, v) for u, v in stream]
+    assert results == [True] * 5 + [False, False], results
+    assert checker.conflict == (4, 5)
+    checker = BipartiteChecker()
+    assert checker.add_many([(1, 2), (2, 3), (3, 4), (10, 11)])
+    assert all(checker.side(u) != checker.side(v) for u, v in [(1, 2), (2, 3), (3, 4), (10, 11)])
+    assert not checker.add_many([(4, 1), (3, 1), (5, 6)]) and checker.conflict == (3, 1)
+    import random
+    random.seed(21)
+    for _ in range(200):
+        n = random.randint(2, 15)
+        pairs = [(random.randint(1, n), random.randint(1, n)) for _ in range(random.randint(0, n))]
+        pairs = [(u, v) for u, v in pairs if u != v]
+        csr = CSRGraph.from_edges(n + 1, pairs + [(v, u) for u, v in pairs])
+        assert possibleBipartition(n, pairs) == possibleBipartition(n, csr)
+    for _ in range(200):
+        n = random.randint(1, 15)
+        pairs = [(random.randint(1, n), random.randint(1, n)) for _ in range(random.randint(0, n + 3))]
+        ok, out = bipartition(n, pairs)
+        assert ok == (possibleBipartition(n, pairs) and all(u != v for u, v in pairs))
+        dislike = {(u, v) for u, v in pairs} | {(v, u) for u, v in pairs}
+        if ok:
+            assert isinstance(out, bytearray) and all(out[u] != out[v] for u, v in pairs)
+        else:
+            assert len(out) % 2 == 1 and len(set(out)) == len(out)
+            assert all((a, b) in dislike for a, b in zip(out, out[1:] + out[:1])), out
+    print("All tests passed!")
+    import sys
+    if "--bench" in sys.argv:
+        benchmark_bipartite()
@@ -0,0 +1,244 @@
+#Contraction hierarchies for static graphs queried many times.
+
+#Preprocessing contracts nodes one at a time in order of importance (edge
+#difference + contracted neighbours, updated lazily). Contracting v adds a
+#shortcut u->x of weight w(u,v)+w(v,x) unless a witness search finds another
+#u->x path that is no longer. A query is a bidirectional dijkstra that only
+#relaxes edges towards higher-ranked nodes, so both searches stay tiny.
+
+#Distances equal plain dijkstra on the original graph.
+
+import struct
+from array import array
+from heapq import heappush, heappop
+from typing import Dict, List
+from algorithm_templates import CSRGraph, Graph, MappedFile
+
+INF = 10**18
+_CH_MAGIC, _CH_VERSION = b'CHIX', 1
+_CH_HEADER = struct.Struct('<4sIqqq')  # magic, version, n, m_up, m_down (32 bytes)
+
+
+class ContractionHierarchy:
+    def __init__(self, n: int, rank: array, up: CSRGraph, down: CSRGraph):
+        self.n = n
+        self.rank = rank  # int32[n], contraction order
+        self.up = up      # u -> v with rank[v] > rank[u]
+        self.down = down  # v -> u for every edge u -> v with rank[u] > rank[v]
+
+    @classmethod
+    def build(cls, n: int, adj: Graph, witness_limit: int = 50) -> "ContractionHierarchy":
+        """witness_limit caps nodes settled per witness search; a missed witness
+        only costs an extra shortcut, never a wrong distance."""
+        nbrs = adj.neighbors if isinstance(adj, CSRGraph) else adj.__getitem__
+        out: List[Dict[int, int]] = [{} for _ in range(n)]
+        inn: List[Dict[int, int]] = [{} for _ in range(n)]
+        for u in range(n):
+            for v, w in nbrs(u):
+                if u != v and w < out[u].get(v, INF):
+                    out[u][v] = w
+                    inn[v][u] = w
+
+        def witness(u, skip, limit, targets):
+            # dijkstra from u among uncontracted nodes, bounded by limit and witness_limit
+            dist, pq, settled = {u: 0}, [(0, u)], 0
+            while pq and settled < witness_limit:
+                d, x = heappop(pq)
+                if d != dist[x]:
+                    continue
+                if d > limit:
+                    break
+                settled += 1
+                for y, w in out[x].items():
+                    nd = d + w
+                    if y != skip and nd < dist.get(y, INF):
+                        dist[y] = nd
+                        heappush(pq, (nd, y))
+            return {x: dist.get(x, INF) for x in targets}
+
+        def shortcuts(v):
+            found = []
+            outs = out[v]
+            for u, w1 in inn[v].items():
+                targets = [x for x in outs if x != u]
+                if not targets:
+                    continue
+                limit = w1 + max(outs[x] for x in targets)
+                best = witness(u, v, limit, targets)
+                for x in targets:
+                    if best[x] > w1 + outs[x]:
+                        found.append((u, x, w1 + outs[x]))
+            return found
+
+        deleted = [0]*n  # contracted neighbours, spreads contraction evenly
+        def priority(v, found):
+            return len(found) - len(inn[v]) - len(out[v]) + deleted[v]
+
+        pq = [(priority(v, shortcuts(v)), v) for v in range(n)]
+        pq.sort()
+        rank = array('i', [0])*n
+        contracted = [False]*n
+        up_edges, down_edges = [], []
+        level = 0
+        while pq:
+            _, v = heappop(pq)
+            if contracted[v]:
+                continue
+            found = shortcuts(v)
+            p = priority(v, found)  # lazy update: re-check against the next candidate
+            if pq and p > pq[0][0]:
+                heappush(pq, (p, v))
+                continue
+            for u, x, w in found:
+                if w < out[u].get(x, INF):
+                    out[u][x] = w
+                    inn[x][u] = w
+            for x, w in out[v].items():
+                up_edges.append((v, x, w))
+                del inn[x][v]
+                deleted[x] += 1
+            for u, w in inn[v].items():
+                down_edges.append((v, u, w))
+                del out[u][v]
+                deleted[u] += 1
+            out[v], inn[v] = {}, {}
+            contracted[v] = True
+            rank[v] = level
+            level += 1
+        return cls(n, rank, CSRGraph.from_edges(n, up_edges), CSRGraph.from_edges(n, down_edges))
+
+    def query(self, src: int, dst: int) -> int:
+        """Bidirectional upward dijkstra; stops once neither frontier can improve best."""
+        if src == dst:
+            return 0
+        df, db = {src: 0}, {dst: 0}
+        pf, pb = [(0, src)], [(0, dst)]
+        best = INF
+        while pf or pb:
+            if pf and (not pb or pf[0][0] <= pb[0][0]):
+                pq, dist, other, g = pf, df, db, self.up
+            else:
+                pq, dist, other, g = pb, db, df, self.down
+            d, u = heappop(pq)
+            if d >= best:
+                # this side cannot improve best any more
+                pq.clear()
+                continue
+            if d != dist[u]:
+                continue
+            if u in other and d + other[u] < best:
+                best = d + other[u]
+            for v, w in g.neighbors(u):
+                nd = d + w
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    heappush(pq, (nd, v))
+        return best
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as f:
+            f.write(_CH_HEADER.pack(_CH_MAGIC, _CH_VERSION, self.n, self.up.m, self.down.m))
+            rank = array('i', self.rank)
+            if self.n % 2: rank.append(0)  # keep the int64 arrays 8-aligned
+            f.write(rank.tobytes())
+            for g in (self.up, self.down):
+                f.write(array('q', g.offsets).tobytes())
+                f.write(array('q', g.weights).tobytes())
+                f.write(array('i', g.targets).tobytes())
+                if g.m % 2: f.write(bytes(4))
+
+    @classmethod
+    def open(cls, path: str) -> "ContractionHierarchy":
+        """Map a saved hierarchy read-only, like CSRGraph.open."""
+        f = MappedFile(path, _CH_HEADER, _CH_MAGIC, _CH_VERSION, "contraction hierarchy")
+        n, m_up, m_down = f.fields
+        rank = f.take('i', n, align=8)
+        graphs = []
+        for m in (m_up, m_down):
+            offsets, weights = f.take('q', n+1), f.take('q', m)
+            graphs.append(CSRGraph(n, offsets, f.take('i', m, align=8), weights))
+        ch = cls(n, rank, *graphs)
+        ch._file = f
+        return ch
+
+    def close(self) -> None:
+        f = getattr(self, '_file', None)
+        if f is not None:
+            f.close(); self._file = None
+
+def random_road_graph(n: int, seed: int = 0) -> CSRGraph:
+    """Synthetic road-like graph: a near-square grid with random two-way weights
+    and a few random long-range links."""
+    import math, random
+    rng = random.Random(seed)
+    cols = max(1, int(math.isqrt(n)))
+    edges = []
+    for u in range(n):
+        for v in (u + 1 if (u + 1) % cols else -1, u + cols):
+            if 0 <= v < n:
+                w = rng.randint(10, 100)
+                edges.append((u, v, w)); edges.append((v, u, w))
+    for _ in range(n // 100):
+        u, v = rng.randrange(n), rng.randrange(n)
+        w = rng.randint(500, 2000)
+        edges.append((u, v, w)); edges.append((v, u, w))
+    return CSRGraph.from_edges(n, edges)
+
+
+def test_contraction_hierarchy() -> None:
+    """CH queries must equal dijkstra, including after a save/open round trip"""
+    import os, random, tempfile
+    from algorithm_templates import dijkstra
+    random.seed(13)
+    for _ in range(30):
+        n = random.randint(1, 30)
+        adj = [[(random.randrange(n), random.randint(0, 20)) for _ in range(random.randint(0, 4))]
+               for _ in range(n)]
+        ch = ContractionHierarchy.build(n, adj)
+        for s in range(n):
+            expected = dijkstra(n, adj, s)
+            for t in range(n):
+                result = ch.query(s, t)
+                assert result == expected[t], f"CH failed {s}->{t}: expected {expected[t]}, got {result}"
+    g = random_road_graph(400)
+    ch = ContractionHierarchy.build(400, g)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'road.ch')
+        ch.save(path)
+        mapped = ContractionHierarchy.open(path)
+        expected = dijkstra(400, g, 7)
+        assert all(mapped.query(7, t) == expected[t] for t in range(400))
+        mapped.close()
+    print("All tests passed!")
+
+
+def benchmark_contraction_hierarchy(n: int = 1_000_000, queries: int = 100) -> None:
+    """Preprocessing time and memory, and query latency against dijkstra.
+    The default is the 1M-node size; pass a smaller n for a quick run."""
+    import random, resource, time
+    from algorithm_templates import dijkstra
+    g = random_road_graph(n)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    ch = ContractionHierarchy.build(n, g)
+    build_time = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    print(f"n={n} m={g.m}: preprocessing {build_time:.1f}s, peak RSS +{(rss_after - rss_before) / 1024:.0f} MiB, "
+          f"{ch.up.m + ch.down.m - g.m} shortcuts")
+    rng = random.Random(2)
+    pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(queries)]
+    start = time.perf_counter()
+    results = [ch.query(s, t) for s, t in pairs]
+    t_ch = (time.perf_counter() - start) / queries
+    sample = pairs[:min(5, queries)]
+    start = time.perf_counter()
+    for (s, t), result in zip(sample, results):
+        assert dijkstra(n, g, s)[t] == result
+    t_dij = (time.perf_counter() - start) / len(sample)
+    print(f"query latency: CH {1000 * t_ch:.2f} ms, dijkstra {1000 * t_dij:.1f} ms")
+
+
+if __name__ == "__main__":
+    import sys
+    test_contraction_hierarchy()
+    benchmark_contraction_hierarchy(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,143 @@
+#Parallel delta-stepping single-source shortest paths.
+
+#Nodes are kept in buckets of width delta by tentative distance. The lowest
+#non-empty bucket is emptied by repeatedly relaxing its light edges (w <= delta),
+#which may refill it; then the heavy edges of everything it settled are relaxed
+#once. Each relaxation phase is split across worker processes that read the CSR
+#arrays and the distance array from multiprocessing.shared_memory and send back
+#(v, new_dist) requests; the coordinator applies them and moves nodes between
+#buckets. Output equals dijkstra.
+
+#The buckets themselves stay in the coordinator as a dict of sets rather than in
+#shared memory. Only the coordinator changes bucket membership, one request at a
+#time, and with several writers each move would need a lock or an atomic
+#compare-and-swap, which multiprocessing does not offer on raw shared arrays.
+#Workers therefore only read shared state. What they get from the coordinator is
+#the frontier they should relax, as a packed int32 array.
+
+from array import array
+from typing import List
+from algorithm_templates import CSRGraph, Graph, SharedArrays, shared_views
+
+INF = 10**18
+
+
+def _layout(n, m):
+    """offsets, targets, weights and dist in shared memory."""
+    return [('q', n+1), ('i', m), ('q', m), ('q', n)]
+
+
+def _relax(offsets, targets, weights, dist, nodes, delta, light):
+    """Requests (v, d) for the light or heavy edges of nodes that improve dist[v]."""
+    out = array('q')
+    for u in nodes:
+        du = dist[u]
+        for i in range(offsets[u], offsets[u+1]):
+            w = weights[i]
+            if (w <= delta) == light:
+                v, nd = targets[i], du + w
+                if nd < dist[v]:
+                    out.append(v); out.append(nd)
+    return out
+
+
+def _relax_worker(args):
+    nodes, delta, light = args
+    offsets, targets, weights, dist = shared_views()
+    return _relax(offsets, targets, weights, dist, array('i', nodes), delta, light).tobytes()
+
+
+def delta_stepping(n: int, adj: Graph, src: int, delta: int = None, processes: int = 1,
+                   min_parallel: int = 2048) -> List[int]:
+    """Distances from src. Phases with fewer than min_parallel frontier nodes are
+    relaxed in the coordinator, since shipping them to workers costs more."""
+    g = adj if isinstance(adj, CSRGraph) else CSRGraph.from_adj(adj)
+    m = g.m
+    weights = g.weights if g.weights is not None else array('q', [1])*m
+    if delta is None:
+        delta = max(1, sum(weights) // m) if m else 1
+    shared, pool = SharedArrays(_layout(n, m)), None
+    try:
+        offsets, targets, wts, dist = shared.views
+        offsets[:], targets[:], wts[:] = array('q', g.offsets), array('i', g.targets), weights
+        for v in range(n):
+            dist[v] = INF
+        if processes > 1:
+            pool = shared.pool(processes)
+
+        def phase(nodes, light):
+            if pool is None or len(nodes) < min_parallel:
+                reqs = [_relax(offsets, targets, wts, dist, nodes, delta, light)]
+            else:
+                step = -(-len(nodes) // processes)
+                chunks = [(nodes[i:i+step].tobytes(), delta, light) for i in range(0, len(nodes), step)]
+                reqs = [array('q', raw) for raw in pool.map(_relax_worker, chunks)]
+            for req in reqs:
+                for j in range(0, len(req), 2):
+                    v, nd = req[j], req[j+1]
+                    if nd < dist[v]:
+                        old = dist[v]
+                        if old < INF and old // delta in buckets:
+                            buckets[old // delta].discard(v)
+                        dist[v] = nd
+                        buckets.setdefault(nd // delta, set()).add(v)
+
+        buckets = {0: {src}}
+        dist[src] = 0
+        while buckets:
+            i = min(buckets)
+            settled = array('i')
+            while buckets.get(i):
+                frontier = array('i', buckets.pop(i))
+                settled.extend(frontier)
+                phase(frontier, True)
+            buckets.pop(i, None)
+            phase(settled, False)
+            for b in [b for b, nodes in buckets.items() if not nodes]:
+                del buckets[b]
+        return dist.tolist()
+    finally:
+        if pool is not None:
+            pool.close(); pool.join()
+        shared.close()
+
+
+def test_delta_stepping() -> None:
+    """delta_stepping must equal dijkstra for any delta and worker count"""
+    import random
+    from algorithm_templates import dijkstra
+    random.seed(17)
+    for _ in range(30):
+        n = random.randint(1, 60)
+        adj = [[(random.randrange(n), random.randint(0, 100)) for _ in range(random.randint(0, 4))]
+               for _ in range(n)]
+        expected = dijkstra(n, adj, 0)
+        for delta in (None, 1, 7, 1000):
+            result = delta_stepping(n, adj, 0, delta)
+            assert result == expected, f"delta={delta}: expected {expected}, got {result}"
+    g = CSRGraph.from_adj(adj)
+    assert delta_stepping(n, g, 0, 25, processes=2, min_parallel=1) == expected
+    print("All tests passed!")
+
+
+def benchmark_delta_stepping(n: int = 200_000, workers=(1, 2, 4, 8, 16, 32, 64), delta: int = None) -> None:
+    """Wall time per worker count on a random sparse graph, against dijkstra."""
+    import os, random, time
+    from algorithm_templates import dijkstra
+    rng = random.Random(3)
+    g = CSRGraph.from_edges(n, [(u, rng.randrange(n), rng.randint(1, 100)) for u in range(n) for _ in range(4)])
+    start = time.perf_counter()
+    expected = dijkstra(n, g, 0)
+    print(f"n={n} m={g.m} on {os.cpu_count()} cores: dijkstra {time.perf_counter() - start:.2f}s")
+    for p in workers:
+        start = time.perf_counter()
+        result = delta_stepping(n, g, 0, delta, processes=p)
+        elapsed = time.perf_counter() - start
+        assert result == expected
+        print(f"delta_stepping with {p:>2} workers: {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    import sys
+    test_delta_stepping()
+    benchmark_delta_stepping(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000, workers=(1, 2, 4))
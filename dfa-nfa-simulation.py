@@ -136,3 +136,467 @@ def nfaaccepts(current, edges, accepting, visited):
 # COMMAND ----------
 
     
+
+# COMMAND ----------
+
+# compiled DFA: the edges dict becomes a dense table with one row per state and
+# one column per symbol (plus a column for "any other symbol"), missing edges go
+# to an absorbing dead state, and matching is a loop over the input -- no
+# recursion and no string[1:] copies.
+# bytes-like input is read as Latin-1: byte b is the symbol chr(b), so an edge on
+# 'é' matches the byte 0xE9 but not 'é'.encode(). Only the columns that some byte
+# reaches get a byte class, so there are at most 256 of them however many symbols
+# the edges use. Input is read through a memoryview in fixed-size chunks. With NumPy
+# each chunk is reduced in O(log n) vectorized steps: every symbol is a function
+# state -> state, and when the DFA's transition monoid (all compositions of
+# those functions) has at most 256 elements, a whole chunk is the composition of
+# its symbols, computed pairwise through a 64K lookup table.
+
+import sys
+from array import array
+
+# the test cells below only check correctness; pass --bench to also run the
+# benchmarks (100 MB of DFA input, an exponential nfasim case, 32 MB of logs)
+BENCHMARK = "--bench" in sys.argv
+
+class CompiledDFA:
+    CHUNK = 1 << 20
+
+    def __init__(self, current, edges, accepting):
+        states = list(dict.fromkeys([current, *(s for s, _ in edges), *edges.values(), *accepting]))
+        symbols = sorted({c for _, c in edges})
+        self.states = states               # table index -> original state
+        self.dead = len(states)
+        self.symbol = {c: k for k, c in enumerate(symbols)}
+        self.width = w = len(symbols) + 1  # column len(symbols) = any other symbol
+        index = {s: i for i, s in enumerate(states)}
+        self.table = table = array('i', [self.dead]) * ((self.dead + 1) * w)
+        for (s, c), t in edges.items():
+            table[index[s]*w + self.symbol[c]] = index[t]
+        self.rows = [table[i*w:(i+1)*w].tolist() for i in range(self.dead + 1)]
+        self.start = index[current]
+        self.accept = bytearray(self.dead + 1)
+        for s in accepting:
+            self.accept[index[s]] = 1
+        other = len(symbols)
+        cols = [self.symbol.get(chr(b), other) for b in range(256)]
+        byte_cols = list(dict.fromkeys(cols))  # table columns reachable from bytes
+        pos = {k: i for i, k in enumerate(byte_cols)}
+        self.byte_class = bytes(pos[k] for k in cols)
+        self.byte_rows = [[row[k] for k in byte_cols] for row in self.rows]
+        self._monoid = None
+
+    def _build_monoid(self, np):
+        """(elements, byte -> element, element-pair table), or False when the
+        transition monoid is larger than 256."""
+        S = self.dead + 1
+        gens = [tuple(row[k] for row in self.byte_rows) for k in range(len(self.byte_rows[0]))]
+        elems = [tuple(range(S))]
+        idx = {elems[0]: 0}
+        for g in gens:
+            if g not in idx: idx[g] = len(elems); elems.append(g)
+        i = 0
+        while i < len(elems):
+            for g in gens:
+                h = tuple(g[x] for x in elems[i])  # elems[i], then g
+                if h not in idx:
+                    if len(elems) == 256:
+                        return False
+                    idx[h] = len(elems); elems.append(h)
+            i += 1
+        comp = np.zeros((256, 256), dtype=np.uint8)
+        for a, f in enumerate(elems):
+            for b, g in enumerate(elems):
+                comp[a, b] = idx[tuple(g[x] for x in f)]
+        lo, hi = np.arange(65536) & 255, np.arange(65536) >> 8  # little-endian uint16 = (first, second)
+        of_byte = np.array([idx[gens[k]] for k in self.byte_class], dtype=np.uint8)
+        return elems, of_byte, comp[lo, hi], comp[of_byte[lo], of_byte[hi]]
+
+    def _reduce(self, np, part, state):
+        elems, of_byte, pairs, byte_pairs = self._monoid
+        even = len(part) & ~1
+        f = byte_pairs[np.frombuffer(part[:even], dtype='<u2')]
+        if even < len(part):
+            f = np.append(f, of_byte[part[-1]])
+        while len(f) > 1:
+            if len(f) & 1:
+                f = np.append(f, np.uint8(0))  # element 0 is the identity
+            f = pairs[f.view('<u2')]
+        return elems[f[0]][state]
+
+    def step(self, state, data):
+        """State reached from table state `state` after reading data
+        (str, bytes, bytearray or memoryview)."""
+        rows, dead = self.rows, self.dead
+        if isinstance(data, str):
+            symbol, other = self.symbol, self.width - 1
+            for ch in data:
+                state = rows[state][symbol.get(ch, other)]
+                if state == dead:
+                    break
+            return state
+        mv, byte_rows = memoryview(data).cast('B'), self.byte_rows
+        np = None
+        if len(mv) >= 4096 and self._monoid is not False:
+            try:
+                import numpy as np
+            except ImportError:
+                self._monoid = False
+            if np is not None and self._monoid is None:
+                self._monoid = self._build_monoid(np)
+        for i in range(0, len(mv), self.CHUNK):
+            part = mv[i:i + self.CHUNK]
+            if np is not None and self._monoid:
+                state = self._reduce(np, part, state)
+            else:
+                for c in part.tobytes().translate(self.byte_class):
+                    state = byte_rows[state][c]
+            if state == dead:
+                break
+        return state
+
+    def accepts(self, data):
+        return bool(self.accept[self.step(self.start, data)])
+
+    def byte_delta(self):
+        """(delta, out) for StreamMatcher: delta[state << 8 | byte] is the next
+        state, out[state] is (0,) in accepting states and () elsewhere."""
+        delta = [row[c] for row in self.byte_rows for c in self.byte_class]
+        return delta, [(0,) if a else () for a in self.accept]
+
+
+def benchmark_dfa(size=100 << 20):
+    """Recursive dfasim vs CompiledDFA on the largest input dfasim survives, then
+    CompiledDFA vs re on `size` bytes of the same language ([01]*00)."""
+    import random, re, time
+    current, edges, accepting = 1, {(1,'0'):2, (1,'1'):1, (2,'0'):3, (2,'1'):1, (3,'0'):3, (3,'1'):1}, [3]
+    dfa = CompiledDFA(current, edges, accepting)
+    rng = random.Random(0)
+    text = ''.join(rng.choice('01') for _ in range(900)) + '00'
+    start = time.perf_counter()
+    for _ in range(100): assert dfasim(text, current, edges, accepting)
+    t_rec = (time.perf_counter() - start) / 100
+    start = time.perf_counter()
+    for _ in range(100): assert dfa.accepts(text)
+    t_tab = (time.perf_counter() - start) / 100
+    print(f"{len(text)} chars: dfasim {1e6 * t_rec:.0f} us, CompiledDFA {1e6 * t_tab:.0f} us")
+    data = bytes(rng.getrandbits(1) + 48 for _ in range(1 << 16)) * (size >> 16) + b'00'
+    start = time.perf_counter()
+    assert dfa.accepts(data)
+    t_tab = time.perf_counter() - start
+    start = time.perf_counter()
+    assert re.fullmatch(rb'[01]*00', data)
+    t_re = time.perf_counter() - start
+    print(f"{len(data) >> 20} MB: CompiledDFA {len(data) / t_tab / 2**20:.0f} MB/s, re {len(data) / t_re / 2**20:.0f} MB/s")
+
+# COMMAND ----------
+
+#test
+current = 1
+edges = {(1,'0'):2, (1,'1'):1, (2,'0'):3, (2,'1'):1, (3,'0'):3, (3,'1'):1}
+accepting = [3]
+dfa = CompiledDFA(current, edges, accepting)
+
+print(dfa.accepts("100100"), dfa.accepts(b"101001001"), dfa.accepts(memoryview(b"1" * 5000 + b"00")))
+import random
+random.seed(23)
+for _ in range(300):
+    s = ''.join(random.choice('012') for _ in range(random.randint(0, 12)))
+    assert dfa.accepts(s) == dfa.accepts(s.encode()) == dfasim(s, current, edges, accepting), s
+for n in (4095, 4096, 4097, 9999):
+    s = ''.join(random.choice('01') for _ in range(n))
+    assert dfa.accepts(s.encode()) == dfa.accepts(s) == s.endswith('00')
+assert not dfa.accepts(b"0" * 5000 + b"2" + b"00")
+wide = CompiledDFA(0, {(0, chr(c)): (1 if c == 0xE9 else 0) for c in range(300)}, [1])  # 300 symbols
+assert wide.accepts("aé") and wide.accepts(b"a\xe9") and not wide.accepts("é".encode())
+assert wide.accepts(b"\x00\xff" * 3000 + b"\xe9") and not wide.accepts("\u012c")
+if BENCHMARK: benchmark_dfa()
+
+# COMMAND ----------
+
+# bitset NFA simulation: the set of states the NFA could be in is one integer
+# (bit i = state i), and reading a symbol maps it to the union of successor
+# sets. Successor sets are pre-ORed per group of 8 states, so a step is one
+# table lookup per 8 states instead of a walk over every path: O(len * S/8)
+# where backtracking nfasim is exponential.
+# With cache_size set, steps are memoized as a lazily built DFA over those sets
+# (subset construction on demand), capped at cache_size transitions with LRU
+# eviction, so each input symbol costs one dict lookup once the cache is warm.
+
+from collections import OrderedDict
+
+class BitsetNFA:
+    def __init__(self, current, edges, accepting, cache_size=None):
+        states = list(dict.fromkeys([current, *(s for s, _ in edges),
+                                     *(t for ts in edges.values() for t in ts), *accepting]))
+        index = {s: i for i, s in enumerate(states)}
+        self.states = states
+        self.start = 1 << index[current]
+        self.accept = sum(1 << index[s] for s in set(accepting))
+        symbols = sorted({c for _, c in edges})
+        self.symbol = {c: k for k, c in enumerate(symbols)}  # also by code point, so bytes input works
+        self.symbol.update({ord(c): k for k, c in enumerate(symbols) if len(c) == 1})
+        groups = (len(states) + 7) // 8
+        # table[k][g][b]: successors on symbol k of the states in group g selected by byte b
+        self.table = [[[0] * 256 for _ in range(groups)] for _ in symbols]
+        for (s, c), targets in edges.items():
+            i, succ = index[s], sum(1 << index[t] for t in set(targets))
+            rows = self.table[self.symbol[c]][i >> 3]
+            for b in range(256):
+                if b >> (i & 7) & 1: rows[b] |= succ
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # (state set, column) -> next state set
+        self.hits = self.misses = 0
+
+    def _move(self, mask, k):
+        nxt, rows = 0, self.table[k]
+        for g in range(len(rows)):
+            b = mask >> (8 * g) & 255
+            if b: nxt |= rows[g][b]
+        return nxt
+
+    def step(self, mask, symbol):
+        """State set after reading one symbol; 0 means no path survives."""
+        k = self.symbol.get(symbol)
+        if k is None: return 0
+        if self.cache_size is None:
+            return self._move(mask, k)
+        key, cache = (mask, k), self.cache
+        nxt = cache.get(key)
+        if nxt is not None:
+            cache.move_to_end(key); self.hits += 1
+            return nxt
+        self.misses += 1
+        nxt = cache[key] = self._move(mask, k)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return nxt
+
+    def accepts(self, data):
+        """data is a str, or bytes-like read one byte at a time."""
+        if not isinstance(data, str): data = memoryview(data).cast('B')
+        mask, step = self.start, self.step
+        for c in data:
+            mask = step(mask, c)
+            if not mask: return False
+        return bool(mask & self.accept)
+
+
+def benchmark_nfa(n=20):
+    """Backtracking nfasim vs BitsetNFA (plain and cached) on an NFA with two
+    ways to read every 0 and an input it must reject, so nfasim tries 2^n paths."""
+    import time
+    edges, accepting = {(1,'0'): [1,2], (2,'0'): [1,2], (1,'1'): [3]}, [3]
+    for name, text, make in (("nfasim", "0" * n, None),
+                             ("bitset", "0" * n, lambda: BitsetNFA(1, edges, accepting)),
+                             ("bitset", "0" * 100000, lambda: BitsetNFA(1, edges, accepting)),
+                             ("cached", "0" * 100000, lambda: BitsetNFA(1, edges, accepting, cache_size=64))):
+        start = time.perf_counter()
+        assert not (make().accepts(text) if make else nfasim(text, 1, edges, accepting))
+        print(f"{name:>7} on {len(text):>6} chars: {1000 * (time.perf_counter() - start):.1f} ms")
+
+# COMMAND ----------
+
+#test
+edges = {(1,'0'): [1,2], (1,'1'): [1], (2,'0'): [3]}
+accepting = [3]
+nfa, cached = BitsetNFA(1, edges, accepting), BitsetNFA(1, edges, accepting, cache_size=2)
+print(nfa.accepts("1010101010101010111110001111100"), cached.accepts(b"1010101010101010111110001111100"))
+random.seed(24)
+for _ in range(300):
+    s = ''.join(random.choice('012') for _ in range(random.randint(0, 12)))
+    assert nfa.accepts(s) == cached.accepts(s.encode()) == nfasim(s, 1, edges, accepting), s
+assert len(cached.cache) <= 2 and cached.hits and cached.misses
+wide = {(i, c): [(i + 1) % 20, (3 * i + int(c)) % 20] for i in range(20) for c in '01'}  # 20 states, 3 groups
+big = BitsetNFA(0, wide, [7], cache_size=100)
+for _ in range(100):
+    s = ''.join(random.choice('01') for _ in range(random.randint(0, 10)))
+    assert big.accepts(s) == nfasim(s, 0, wide, [7]), s
+if BENCHMARK: benchmark_nfa()
+
+# COMMAND ----------
+
+# streaming matching: the automaton's state is carried across chunks, so a log
+# stream can be scanned piece by piece with constant memory. StreamMatcher works
+# on any automaton with byte_delta(): a CompiledDFA (a match is reported after
+# every byte that leaves it in an accepting state, including bytes that keep it
+# in one, so every accepted prefix) or an AhoCorasick automaton for many literal
+# patterns at once (a match ends wherever one of the patterns ends).
+# scan_file reads through mmap or a fixed reusable buffer, scan_stream reads any
+# file-like object or socket, and scan_files spreads files over a pool.
+
+import mmap
+from collections import deque
+
+class AhoCorasick:
+    def __init__(self, patterns):
+        self.patterns = [p.encode() if isinstance(p, str) else bytes(p) for p in patterns]
+        goto, out = [{}], [[]]
+        for k, p in enumerate(self.patterns):
+            s = 0
+            for b in p:
+                if b not in goto[s]:
+                    goto[s][b] = len(goto); goto.append({}); out.append([])
+                s = goto[s][b]
+            out[s].append(k)
+        # BFS from the root: a missing edge follows the failure link's edge, so the
+        # table has a transition for every byte and matching never backtracks
+        delta, fail = [0] * (256 * len(goto)), [0] * len(goto)
+        queue = deque()
+        for b, t in goto[0].items():
+            delta[b] = t; queue.append(t)
+        while queue:
+            s = queue.popleft()
+            out[s].extend(out[fail[s]])
+            for b in range(256):
+                t = goto[s].get(b)
+                if t is None:
+                    delta[s << 8 | b] = delta[fail[s] << 8 | b]
+                else:
+                    fail[t] = delta[fail[s] << 8 | b]
+                    delta[s << 8 | b] = t
+                    queue.append(t)
+        self.start = 0
+        self._delta, self._out = delta, [tuple(o) for o in out]
+
+    def byte_delta(self):
+        return self._delta, self._out
+
+
+class StreamMatcher:
+    """feed() chunks in order; each call returns the (end offset, output) pairs
+    completed in that chunk, where end is one past the last matched byte and
+    output is the pattern index (always 0 for a CompiledDFA). state and offset
+    can be saved and passed back in to resume a scan."""
+
+    def __init__(self, automaton, state=None, offset=0):
+        self.delta, self.out = automaton.byte_delta()
+        self.state = automaton.start if state is None else state
+        self.offset = offset
+
+    def feed(self, chunk):
+        delta, out, s = self.delta, self.out, self.state
+        found, end = [], self.offset
+        for b in memoryview(chunk).cast('B'):
+            s = delta[s << 8 | b]
+            end += 1
+            if out[s]:
+                found.extend((end, k) for k in out[s])
+        self.state, self.offset = s, end
+        return found
+
+
+def scan_stream(stream, automaton, buffer_size=1 << 20):
+    """Yield matches from a file object (readinto) or socket (recv_into),
+    reusing one buffer of buffer_size bytes."""
+    matcher, buf = StreamMatcher(automaton), bytearray(buffer_size)
+    view = memoryview(buf)
+    read = getattr(stream, 'readinto', None) or stream.recv_into
+    while True:
+        n = read(buf)
+        if not n:
+            return
+        yield from matcher.feed(view[:n])
+
+
+def scan_file(path, automaton, use_mmap=True, buffer_size=1 << 20):
+    """Yield matches from a file, mapped (use_mmap) or read in fixed-size buffers."""
+    with open(path, 'rb') as f:
+        if not use_mmap:
+            yield from scan_stream(f, automaton, buffer_size)
+            return
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return
+    with mm:
+        matcher, view = StreamMatcher(automaton), memoryview(mm)
+        try:
+            for i in range(0, len(mm), buffer_size):
+                yield from matcher.feed(view[i:i + buffer_size])
+        finally:
+            view.release()
+
+
+def _scan_one(job):
+    path, automaton, use_mmap, collect = job
+    matches = scan_file(path, automaton, use_mmap)
+    return path, list(matches) if collect else sum(1 for _ in matches)
+
+
+def scan_files(paths, automaton, workers=4, processes=True, use_mmap=True, collect=False):
+    """Yield (path, match count) for every file, scanned on a process (or thread)
+    pool. With collect, yield (path, matches) instead: each worker then holds a
+    whole file's matches in memory and sends them back in one piece."""
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    pool = (ProcessPoolExecutor if processes else ThreadPoolExecutor)(workers)
+    with pool:
+        yield from pool.map(_scan_one, [(p, automaton, use_mmap, collect) for p in paths])
+
+
+def benchmark_stream_scan(files=4, size=8 << 20, workers=(1, 2, 4)):
+    """Throughput of scanning generated log files for a few literals: mmap vs
+    buffered reads, re.finditer as a reference, then the file pool."""
+    import os, random, re, tempfile, time
+    patterns = [b"ERROR", b"timeout", b"segfault", b"disk full"]
+    ac = AhoCorasick(patterns)
+    rng = random.Random(25)
+    words = [b"INFO", b"request", b"ok", b"user", b"GET", b"200", b"latency"] * 20 + patterns
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(files):
+            line = b" ".join(rng.choice(words) for _ in range(4096)) + b"\n"
+            path = os.path.join(tmp, f"log{i}.txt")
+            with open(path, 'wb') as f:
+                f.write(line * (size // len(line)))
+            paths.append(path)
+        total = sum(os.path.getsize(p) for p in paths)
+        for name, run in (("mmap", lambda p: sum(1 for _ in scan_file(p, ac))),
+                          ("buffered", lambda p: sum(1 for _ in scan_file(p, ac, use_mmap=False))),
+                          ("re", lambda p: sum(1 for _ in re.finditer(b"|".join(map(re.escape, patterns)),
+                                                                      open(p, 'rb').read())))):
+            start = time.perf_counter()
+            count = run(paths[0])
+            elapsed = time.perf_counter() - start
+            print(f"{name:>8}: {os.path.getsize(paths[0]) / elapsed / 2**20:.1f} MB/s ({count} matches)")
+        for w in workers:
+            start = time.perf_counter()
+            count = sum(c for _, c in scan_files(paths, ac, workers=w))
+            elapsed = time.perf_counter() - start
+            print(f"{files} files, {w} processes: {total / elapsed / 2**20:.1f} MB/s on {os.cpu_count()} cores")
+
+# COMMAND ----------
+
+#test
+ac = AhoCorasick(["he", "she", "his", "hers"])
+text = b"ushers and his sheep"
+expected = sorted((i + len(p), k) for k, p in enumerate(ac.patterns) for i in range(len(text)) if text.startswith(p, i))
+assert sorted(StreamMatcher(ac).feed(text)) == expected
+for cut in range(len(text) + 1):  # a match split across chunks is still found
+    m = StreamMatcher(ac)
+    got = m.feed(text[:cut])
+    resumed = StreamMatcher(ac, m.state, m.offset)
+    assert sorted(got + resumed.feed(memoryview(text)[cut:])) == expected
+dfa = CompiledDFA(1, {(1,'0'):2, (1,'1'):1, (2,'0'):3, (2,'1'):1, (3,'0'):3, (3,'1'):1}, [3])
+assert StreamMatcher(dfa).feed(b"1001000") == [(3, 0), (6, 0), (7, 0)]
+import os, random, socket, tempfile
+with tempfile.TemporaryDirectory() as tmp:
+    paths = []
+    for i in range(3):
+        data = bytes(random.choice(b"heisr ") for _ in range(5000 + i))
+        path = os.path.join(tmp, f"f{i}")
+        with open(path, 'wb') as f: f.write(data)
+        paths.append(path)
+        want = StreamMatcher(ac).feed(data)
+        assert list(scan_file(path, ac)) == list(scan_file(path, ac, use_mmap=False, buffer_size=7)) == want
+    open(os.path.join(tmp, "empty"), 'wb').close()
+    assert list(scan_file(os.path.join(tmp, "empty"), ac)) == []
+    results = dict(scan_files(paths, ac, workers=2, collect=True))
+    assert results == dict(scan_files(paths, ac, workers=2, processes=False, use_mmap=False, collect=True))
+    assert all(results[p] == list(scan_file(p, ac)) for p in paths)
+    assert dict(scan_files(paths, ac, workers=2)) == {p: len(m) for p, m in results.items()}
+a, b = socket.socketpair()
+a.sendall(text); a.close()
+assert sorted(scan_stream(b, ac, buffer_size=3)) == expected
+b.close()
+if BENCHMARK: benchmark_stream_scan()
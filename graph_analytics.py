@@ -0,0 +1,330 @@
+#Connected components and minimum spanning forests built on union-find.
+
+#connected_components hands the edge list to ArrayDSU.union_many and relabels
+#the roots 0..k-1. kruskal_mst sorts edge indices by weight and keeps every edge
+#that joins two DSU trees. boruvka_mst runs rounds of "cheapest edge leaving
+#each component": the edge scan is split across worker processes that read the
+#edge arrays, the component labels and the list of still-crossing edges from
+#multiprocessing.shared_memory and send back (component, edge) candidates; the
+#coordinator merges them, unions the winners, rewrites the labels and drops
+#edges that now lie inside one component. Ties are broken by edge index, so the
+#chosen edges never form a cycle.
+
+#offline_connectivity answers connectivity queries over a log of edge additions
+#and removals. Each edge is alive over an interval of query times; the interval
+#is stored on O(log Q) nodes of a segment tree over time, and a DFS of the tree
+#unions a node's edges on entry and rolls them back on exit (RollbackDSU), so
+#each leaf sees exactly the edges alive at its query.
+
+#Forests are returned as int32 arrays of edge indices into the input edges.
+
+from array import array
+from typing import Iterable, List, Tuple, Union
+from algorithm_templates import CSRGraph, DSU, ArrayDSU, RollbackDSU, SharedArrays, shared_views
+
+Edges = Union[Iterable[Tuple[int, ...]], CSRGraph]
+
+def edge_arrays(n: int, edges: Edges) -> Tuple[array, array, array]:
+    """(u, v, w) as int32/int32/int64 arrays; unweighted edges get weight 1.
+    A CSRGraph yields its edges in CSR order, so edge i is targets[i]."""
+    if isinstance(edges, CSRGraph):
+        us = array('i')
+        for u in range(n):
+            us.extend([u] * (edges.offsets[u+1] - edges.offsets[u]))
+        ws = array('q', edges.weights) if edges.weights is not None else array('q', [1]) * edges.m
+        return us, array('i', edges.targets), ws
+    us, vs, ws = array('i'), array('i'), array('q')
+    for e in edges:
+        us.append(e[0]); vs.append(e[1]); ws.append(e[2] if len(e) > 2 else 1)
+    return us, vs, ws
+
+
+def connected_components(n: int, edges: Edges) -> array:
+    """Component label per node, numbered 0..k-1 in order of each component's smallest node."""
+    us, vs, _ = edge_arrays(n, edges)
+    dsu = ArrayDSU(n)
+    try:
+        import numpy as np
+        dsu.union_many(np.stack((np.frombuffer(us, dtype=np.int32), np.frombuffer(vs, dtype=np.int32)), axis=1))
+        roots = dsu.find_many(np.arange(n))
+        _, first, inverse = np.unique(roots, return_index=True, return_inverse=True)
+        order = np.argsort(np.argsort(first)).astype(np.int32)
+        return array('i', order[inverse].astype(np.int32).tobytes())
+    except ImportError:
+        dsu.union_many(zip(us, vs))
+    label, ids = array('i', [0]) * n, {}
+    for x in range(n):
+        label[x] = ids.setdefault(dsu.find(x), len(ids))
+    return label
+
+
+def kruskal_mst(n: int, edges: Edges) -> array:
+    """Edge indices of a minimum spanning forest, in the order they were taken."""
+    us, vs, ws = edge_arrays(n, edges)
+    dsu, forest = DSU(n), array('i')
+    for i in sorted(range(len(us)), key=ws.__getitem__):
+        if dsu.union(us[i], vs[i]):
+            forest.append(i)
+            if len(forest) == n - 1:
+                break
+    return forest
+
+
+def _layout(n, m):
+    """us, vs, ws, comp and live in shared memory."""
+    return [('i', m), ('i', m), ('q', m), ('i', n), ('i', m)]
+
+
+def _cheapest(us, vs, ws, comp, edges):
+    """Pairs (component, edge) with the lightest of edges leaving each component."""
+    best = {}
+    for i in edges:  # ascending, so ties keep the lower index
+        a, b = comp[us[i]], comp[vs[i]]
+        if a != b:
+            w = ws[i]
+            j = best.get(a)
+            if j is None or w < ws[j]:
+                best[a] = i
+            j = best.get(b)
+            if j is None or w < ws[j]:
+                best[b] = i
+    out = array('q')
+    for c, i in best.items():
+        out.append(c); out.append(i)
+    return out
+
+
+def _cheapest_worker(bounds):
+    lo, hi = bounds
+    us, vs, ws, comp, live = shared_views()
+    return _cheapest(us, vs, ws, comp, live[lo:hi]).tobytes()
+
+
+def boruvka_mst(n: int, edges: Edges, processes: int = 1, min_parallel: int = 1 << 15) -> array:
+    """Edge indices of a minimum spanning forest, one batch per Borůvka round.
+    Rounds with fewer than min_parallel edges are scanned in the coordinator."""
+    arrays = edge_arrays(n, edges)
+    m = len(arrays[0])
+    shared, pool = SharedArrays(_layout(n, m)), None
+    try:
+        for view, buf in zip(shared.views, arrays):
+            view[:] = buf
+        us, vs, ws, comp, live = shared.views
+        for x in range(n):
+            comp[x] = x
+        for i in range(m):
+            live[i] = i
+        alive = m  # live[:alive] are the edges still joining two components
+        if processes > 1 and m >= min_parallel:
+            pool = shared.pool(processes)
+        dsu, forest = DSU(n), array('i')
+        while True:
+            if pool is None or alive < min_parallel:
+                found = [_cheapest(us, vs, ws, comp, live[:alive])]
+            else:
+                step = -(-alive // processes)
+                found = [array('q', raw) for raw in
+                         pool.map(_cheapest_worker, [(i, min(alive, i + step)) for i in range(0, alive, step)])]
+            best = {}
+            for pairs in found:
+                for j in range(0, len(pairs), 2):
+                    c, i = pairs[j], pairs[j+1]
+                    k = best.get(c)
+                    if k is None or (ws[i], i) < (ws[k], k):
+                        best[c] = i
+            added = 0
+            for i in sorted(set(best.values())):
+                if dsu.union(us[i], vs[i]):
+                    forest.append(i); added += 1
+            if not added:
+                return forest
+            for x in range(n):
+                comp[x] = dsu.find(comp[x])
+            kept = 0
+            for i in live[:alive]:
+                if comp[us[i]] != comp[vs[i]]:
+                    live[kept] = i; kept += 1
+            alive = kept
+    finally:
+        if pool is not None:
+            pool.close(); pool.join()
+        shared.close()
+
+
+def offline_connectivity(n: int, events: Iterable[Tuple[str, int, int]]) -> List[bool]:
+    """events are ('add', u, v), ('remove', u, v) and ('query', u, v) in time order;
+    returns whether u and v are connected at each query. Edges are undirected and
+    may be added more than once; a remove closes the latest open copy.
+    O((N + Q) log Q log N) for N edge events and Q queries."""
+    opened, spans, queries = {}, [], []
+    for kind, u, v in events:
+        if kind == 'query':
+            queries.append((u, v))
+            continue
+        key = (u, v) if u < v else (v, u)
+        if kind == 'add':
+            opened.setdefault(key, []).append(len(queries))
+        elif kind == 'remove':
+            starts = opened.get(key)
+            if not starts:
+                raise ValueError(f"remove of edge {key} that is not present")
+            start = starts.pop()
+            if start < len(queries):
+                spans.append((start, len(queries), key))
+        else:
+            raise ValueError(f"unknown event {kind!r}")
+    q = len(queries)
+    for key, starts in opened.items():
+        spans.extend((start, q, key) for start in starts if start < q)
+    size = 1
+    while size < q: size *= 2
+    seg = [[] for _ in range(2 * size)]
+    for lo, hi, key in spans:  # [lo, hi) onto the canonical nodes of an iterative segment tree
+        lo += size; hi += size
+        while lo < hi:
+            if lo & 1: seg[lo].append(key); lo += 1
+            if hi & 1: hi -= 1; seg[hi].append(key)
+            lo //= 2; hi //= 2
+    dsu, answers = RollbackDSU(n), [False] * q
+    stack = [(1, None)] if q else []  # (node, None) enters a node, (node, mark) leaves it
+    while stack:
+        node, mark = stack.pop()
+        if mark is not None:
+            dsu.rollback(mark)
+            continue
+        mark = dsu.snapshot()
+        for u, v in seg[node]:
+            dsu.union(u, v)
+        if node >= size:
+            u, v = queries[node - size]
+            answers[node - size] = dsu.find(u) == dsu.find(v)
+            dsu.rollback(mark)
+            continue
+        stack.append((node, mark))
+        half = size >> node.bit_length()  # leaves under each child
+        if (2*node + 1) * half - size < q:  # right child has at least one query
+            stack.append((2*node + 1, None))
+        stack.append((2*node, None))
+    return answers
+
+
+def test_graph_analytics() -> None:
+    """Components must match a DSU partition; both MSTs must be spanning forests of equal weight"""
+    import random
+    random.seed(18)
+    for _ in range(40):
+        n = random.randint(1, 60)
+        edges = [(random.randrange(n), random.randrange(n), random.randint(0, 9))
+                 for _ in range(random.randint(0, 2 * n))]
+        ref = DSU(n)
+        for u, v, _ in edges:
+            ref.union(u, v)
+        label = connected_components(n, edges)
+        assert all((label[a] == label[b]) == (ref.find(a) == ref.find(b)) for a in range(n) for b in range(n))
+        k = len({ref.find(x) for x in range(n)})
+        assert sorted(set(label)) == list(range(k)) and label[0] == 0
+        forests = [kruskal_mst(n, edges), boruvka_mst(n, edges), boruvka_mst(n, edges, processes=2, min_parallel=1)]
+        for forest in forests:
+            assert len(forest) == n - k and len(set(forest)) == len(forest)
+            check = DSU(n)
+            assert all(check.union(edges[i][0], edges[i][1]) for i in forest), "forest has a cycle"
+        weights = [sum(edges[i][2] for i in forest) for forest in forests]
+        assert weights[0] == weights[1] == weights[2], f"MST weights differ: {weights}"
+    g = CSRGraph.from_edges(4, [(0, 1, 5), (1, 2, 1), (0, 2, 2), (3, 3, 1)])
+    assert list(connected_components(4, g)) == [0, 0, 0, 1]
+    assert sorted(kruskal_mst(4, g)) == sorted(boruvka_mst(4, g)) == [1, 2]
+    for _ in range(30):
+        n = random.randint(1, 12)
+        events, alive = [], []
+        for _ in range(random.randint(0, 80)):
+            r = random.random()
+            if r < 0.4 or not alive and r < 0.7:
+                e = (random.randrange(n), random.randrange(n))
+                alive.append(e); events.append(('add',) + e)
+            elif r < 0.7:
+                u, v = alive.pop(random.randrange(len(alive)))
+                events.append(('remove', v, u) if random.random() < 0.5 else ('remove', u, v))
+            else:
+                events.append(('query', random.randrange(n), random.randrange(n)))
+        expected, live = [], []
+        for kind, u, v in events:
+            if kind == 'add': live.append((u, v))
+            elif kind == 'remove': live.remove((u, v) if (u, v) in live else (v, u))
+            else:
+                dsu = DSU(n)
+                for a, b in live: dsu.union(a, b)
+                expected.append(dsu.find(u) == dsu.find(v))
+        assert offline_connectivity(n, events) == expected
+    for events in ([('remove', 0, 1)], [('add', 0, 1), ('remove', 1, 0), ('remove', 0, 1)]):
+        try:
+            offline_connectivity(2, events)
+            assert False, "remove of a missing edge accepted"
+        except ValueError:
+            pass
+    print("All tests passed!")
+
+
+def benchmark_offline_connectivity(n: int = 100_000, events: int = 1_000_000, samples: int = 50) -> None:
+    """Offline segment-tree engine against rebuilding a DSU for a sample of queries."""
+    import random, time
+    rng = random.Random(5)
+    log, alive = [], []
+    for _ in range(events):
+        r = rng.random()
+        if r < 0.4 or not alive and r < 0.7:
+            e = (rng.randrange(n), rng.randrange(n))
+            alive.append(e); log.append(('add',) + e)
+        elif r < 0.7:
+            i = rng.randrange(len(alive))
+            alive[i], alive[-1] = alive[-1], alive[i]
+            log.append(('remove',) + alive.pop())
+        else:
+            log.append(('query', rng.randrange(n), rng.randrange(n)))
+    start = time.perf_counter()
+    answers = offline_connectivity(n, log)
+    elapsed = time.perf_counter() - start
+    print(f"n={n}, {events} events ({len(answers)} queries): offline {elapsed:.2f}s")
+    every = max(1, len(answers) // samples)
+    live, seen, spent, rebuilt = {}, 0, 0.0, 0
+    for kind, u, v in log:  # replay the log, rebuilding a DSU for every `every`-th query
+        key = (u, v) if u < v else (v, u)
+        if kind == 'add': live[key] = live.get(key, 0) + 1
+        elif kind == 'remove': live[key] -= 1
+        else:
+            if seen % every == 0:
+                start = time.perf_counter()
+                dsu = DSU(n)
+                for (a, b), c in live.items():
+                    if c: dsu.union(a, b)
+                assert (dsu.find(u) == dsu.find(v)) == answers[seen]
+                spent += time.perf_counter() - start; rebuilt += 1
+            seen += 1
+    per_query = spent / max(1, rebuilt)
+    print(f"rebuild per query: {1000 * per_query:.1f} ms/query over {rebuilt} sampled queries "
+          f"(~{per_query * len(answers):.0f}s for all queries)")
+
+
+def benchmark_graph_analytics(sizes=(100_000, 400_000), workers=(1, 2, 4, 8), degree: int = 4) -> None:
+    """Wall time of each routine per graph size, and Borůvka per worker count."""
+    import os, random, time
+    print(f"{os.cpu_count()} cores")
+    for n in sizes:
+        rng = random.Random(n)
+        edges = [(rng.randrange(n), rng.randrange(n), rng.randint(1, 1000)) for _ in range(degree * n)]
+        times = []
+        for run in (connected_components, kruskal_mst):
+            start = time.perf_counter()
+            run(n, edges)
+            times.append(time.perf_counter() - start)
+        line = f"n={n} m={len(edges)}: components {times[0]:.2f}s, kruskal {times[1]:.2f}s"
+        for p in workers:
+            start = time.perf_counter()
+            boruvka_mst(n, edges, processes=p)
+            line += f", boruvka/{p} {time.perf_counter() - start:.2f}s"
+        print(line)
+
+
+if __name__ == "__main__":
+    test_graph_analytics()
+    benchmark_graph_analytics(workers=(1, 2, 4))
+    benchmark_offline_connectivity(events=200_000)
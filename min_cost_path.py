@@ -4,9 +4,11 @@
 
 #Solution (O(mn log mn))
 
-from heapq import heappush, heappop
-from typing import List
+from heapq import heappush, heappop, heapify
+from typing import List, Tuple
 import math
+import numbers
+from algorithm_templates import make_queue, QUEUE_KINDS
 
 def min_cost_path(grid: List[List[int]]) -> int:
     m, n = len(grid), len(grid[0])
@@ -31,6 +33,294 @@ def min_cost_path(grid: List[List[int]]) -> int:
     return -1
 
 
+def min_cost_path_search(grid: List[List[int]], mode: str = "dijkstra", queue="heapq",
+                         dirs: bytearray = None) -> Tuple[int, int]:
+    """Early-exit search with a choice of mode: "dijkstra", "astar" or "bidirectional".
+
+    Returns (cost, settled), where settled counts the cells popped as final.
+    A* uses h = manhattan distance to the target * the minimum cell cost,
+    which never overestimates since every step pays at least that much.
+    queue is any kind accepted by make_queue ("heapq", "bucket", "radix", "auto").
+    dirs, if given, receives 2-bit route codes per cell (see min_cost_path_route).
+    """
+    if mode == "bidirectional":
+        if dirs is not None:
+            raise ValueError("route codes are only recorded by one-directional search")
+        return _min_cost_path_bidirectional(grid, queue)
+    if mode not in ("dijkstra", "astar"):
+        raise ValueError(f"unknown search mode: {mode}")
+    m, n = len(grid), len(grid[0])
+    INF = 10**18
+    lo = min(min(row) for row in grid) if mode == "astar" else 0
+    # keys rise by at most the entered cell's cost plus lo per step
+    pq = make_queue(queue, max(max(row) for row in grid) + lo, m*n)
+    dist = [[INF]*n for _ in range(m)]
+    dist[0][0] = grid[0][0]
+    pq.push(grid[0][0] + lo*(m-1 + n-1), 0)
+    DIRS = [(1,0),(-1,0),(0,1),(0,-1)]
+    settled = 0
+    while pq:
+        key, cell = pq.pop()
+        r, c = divmod(cell, n)
+        d = dist[r][c]
+        if key != d + lo*(m-1-r + n-1-c):  # same expression as the push, so exact for floats
+            continue
+        settled += 1
+        if (r, c) == (m-1, n-1):
+            return d, settled
+        for k, (dr, dc) in enumerate(DIRS):
+            nr, nc = r+dr, c+dc
+            if 0 <= nr < m and 0 <= nc < n:
+                nd = d + grid[nr][nc]
+                if nd < dist[nr][nc]:
+                    dist[nr][nc] = nd
+                    if dirs is not None:
+                        i, sh = divmod(nr*n + nc, 4)
+                        dirs[i] = dirs[i] & ~(3 << 2*sh) | k << 2*sh
+                    pq.push(nd + lo*(m-1-nr + n-1-nc), nr*n + nc)
+    return -1, settled
+
+
+def min_cost_path_route(grid: List[List[int]], mode: str = "dijkstra", queue="heapq") -> Tuple[int, bytearray]:
+    """Cost plus route codes: 2 bits per cell, packed 4 cells per byte, holding the
+    index into DIRS of the step that last improved the cell. A 10k x 10k grid
+    needs 25 MB. Walk the route with grid_path."""
+    m, n = len(grid), len(grid[0])
+    dirs = bytearray((m*n + 3) // 4)
+    cost, _ = min_cost_path_search(grid, mode, queue, dirs)
+    return cost, dirs
+
+
+def grid_path(dirs: bytearray, n: int, target: Tuple[int, int]):
+    """Yield cells from target back to (0, 0) by undoing the recorded steps."""
+    DIRS = [(1,0),(-1,0),(0,1),(0,-1)]
+    r, c = target
+    while (r, c) != (0, 0):
+        yield r, c
+        i, sh = divmod(r*n + c, 4)
+        dr, dc = DIRS[dirs[i] >> 2*sh & 3]
+        r, c = r-dr, c-dc
+    yield 0, 0
+
+
+def _min_cost_path_bidirectional(grid: List[List[int]], queue="heapq") -> Tuple[int, int]:
+    """Bidirectional Dijkstra. Forward labels include the cell's own cost,
+    backward labels are the cost still to pay after leaving the cell."""
+    m, n = len(grid), len(grid[0])
+    INF = 10**18
+    hi = max(max(row) for row in grid)
+    df = [[INF]*n for _ in range(m)]
+    db = [[INF]*n for _ in range(m)]
+    df[0][0] = grid[0][0]
+    db[m-1][n-1] = 0
+    if not isinstance(queue, str):
+        raise ValueError("bidirectional search needs two queues; pass a queue kind")
+    pf, pb = make_queue(queue, hi, m*n), make_queue(queue, hi, m*n)
+    pf.push(grid[0][0], 0)
+    pb.push(0, m*n - 1)
+    DIRS = [(1,0),(-1,0),(0,1),(0,-1)]
+    best = grid[0][0] if (m, n) == (1, 1) else INF
+    settled = 0
+    # Stop once no path through the unsettled frontiers can beat the best meeting point
+    while pf and pb and pf.min_key() + pb.min_key() < best:
+        forward = pf.min_key() <= pb.min_key()
+        pq, dist, other = (pf, df, db) if forward else (pb, db, df)
+        d, cell = pq.pop()
+        r, c = divmod(cell, n)
+        if d != dist[r][c]:
+            continue
+        settled += 1
+        for dr, dc in DIRS:
+            nr, nc = r+dr, c+dc
+            if 0 <= nr < m and 0 <= nc < n:
+                nd = d + (grid[nr][nc] if forward else grid[r][c])
+                if nd < dist[nr][nc]:
+                    dist[nr][nc] = nd
+                    pq.push(nd, nr*n + nc)
+                    if other[nr][nc] < INF and nd + other[nr][nc] < best:
+                        best = nd + other[nr][nc]
+    return (best if best < INF else -1), settled
+
+
+class GridRouter:
+    """Stateful min_cost_path that repairs itself after cell cost changes (LPA*).
+
+    g holds settled path costs and rhs the one-step lookahead
+    rhs[v] = min(g[u] for neighbours u) + grid[v]; cells where they differ sit in
+    the queue. update_cells only re-evaluates rhs of the changed cells, so the
+    next cost() call expands just the region whose distances actually moved.
+    The A* heuristic is manhattan distance * the minimum cell cost.
+
+    LPA* needs strictly positive edge costs (zero-cost cells could keep each
+    other's stale values alive), so internally entering a cell costs
+    cost * K + 1 with K = m*n + 1: ties break by path length and cost() divides
+    the step count back out. That trick is only exact for integers, so
+    non-integer costs (floats included) raise TypeError; use min_cost_path or
+    min_cost_path_numpy for float grids.
+    """
+
+    DIRS = [(1,0),(-1,0),(0,1),(0,-1)]
+    COMPACT = 2  # rebuild the queue once it holds this many entries per cell
+
+    def __init__(self, grid: List[List[int]]):
+        self._check_costs(v for row in grid for v in row)
+        self.grid = [row[:] for row in grid]
+        self.m, self.n = len(grid), len(grid[0])
+        self.K = self.m * self.n + 1
+        self.lo = min(min(row) for row in grid)
+        INF = self.INF = 10**30
+        self.g = [INF] * (self.m * self.n)
+        self.rhs = [INF] * (self.m * self.n)
+        self.goal = self.m * self.n - 1
+        self.rhs[0] = grid[0][0] * self.K + 1
+        self.pq = [self._key(0) + (0,)]
+        self.expanded = 0  # cells expanded by the last cost() call
+
+    @staticmethod
+    def _check_costs(costs) -> None:
+        for v in costs:
+            if not isinstance(v, numbers.Integral):
+                raise TypeError(f"GridRouter needs integer cell costs, got {v!r}")
+
+    def _key(self, u: int) -> Tuple[int, int]:
+        r, c = divmod(u, self.n)
+        k = min(self.g[u], self.rhs[u])
+        return k + (self.lo * self.K + 1) * (self.m-1-r + self.n-1-c), k
+
+    def _neighbors(self, u: int):
+        r, c = divmod(u, self.n)
+        for dr, dc in self.DIRS:
+            nr, nc = r+dr, c+dc
+            if 0 <= nr < self.m and 0 <= nc < self.n:
+                yield nr*self.n + nc
+
+    def _update_vertex(self, v: int) -> None:
+        if v != 0:
+            r, c = divmod(v, self.n)
+            self.rhs[v] = min(self.g[u] for u in self._neighbors(v)) + self.grid[r][c] * self.K + 1
+        if self.g[v] != self.rhs[v]:
+            heappush(self.pq, self._key(v) + (v,))
+
+    def cost(self) -> int:
+        g, rhs, pq, goal = self.g, self.rhs, self.pq, self.goal
+        self.expanded = 0
+        while pq and (pq[0][:2] < self._key(goal) or rhs[goal] != g[goal]):
+            k1, k2, u = heappop(pq)
+            if g[u] == rhs[u]:
+                continue  # stale entry for a cell that is already consistent
+            key = self._key(u)
+            if (k1, k2) < key:
+                heappush(pq, key + (u,))
+                continue
+            self.expanded += 1
+            if g[u] > rhs[u]:
+                g[u] = rhs[u]
+            else:
+                g[u] = self.INF
+                self._update_vertex(u)
+            for v in self._neighbors(u):
+                self._update_vertex(v)
+        if len(pq) > self.COMPACT * self.m * self.n:
+            self._compact()
+        return g[goal] // self.K
+
+    def update_cells(self, changes) -> None:
+        """Apply (r, c, new_cost) changes; the repair happens on the next cost()."""
+        changes = list(changes)
+        self._check_costs(cost for _, _, cost in changes)
+        changed = []
+        for r, c, new_cost in changes:
+            if self.grid[r][c] != new_cost:
+                self.grid[r][c] = new_cost
+                changed.append(r*self.n + c)
+        if not changed:
+            return
+        lo = min(self.lo, min(self.grid[u // self.n][u % self.n] for u in changed))
+        if lo < self.lo:
+            # a smaller heuristic lowers queued keys, so rebuild the queue
+            self.lo = lo
+            self._compact()
+        if 0 in changed:
+            self.rhs[0] = self.grid[0][0] * self.K + 1
+        for u in changed:
+            self._update_vertex(u)
+        if len(self.pq) > self.COMPACT * self.m * self.n:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rebuild the queue with one fresh entry per inconsistent cell, dropping
+        stale and duplicate entries (consistent cells keyed past the goal are
+        never popped, so they would otherwise pile up across updates)."""
+        g, rhs = self.g, self.rhs
+        live = {u for _, _, u in self.pq if g[u] != rhs[u]}
+        self.pq = [self._key(u) + (u,) for u in live]
+        heapify(self.pq)
+
+
+def min_cost_path_numpy(grid, return_dist: bool = False, delta: int = None):
+    """Vectorized delta-stepping over a 2-D NumPy cost array (or nested lists).
+
+    Cells with tentative distance below the current bucket bound are relaxed
+    together with whole-array gathers and np.minimum.at; cells that land past
+    the bound wait in a pending list for a later bucket. The grid is padded
+    with a border whose distance is 0, so no neighbor needs a bounds check.
+    Integer grids are solved in int32/int64, float grids in float64; any other
+    dtype raises TypeError. Returns the same cost as min_cost_path, or
+    (cost, dist) with the full m x n distance field when return_dist is set.
+    """
+    import numpy as np
+    cost = np.asarray(grid)
+    m, n = cost.shape
+    if cost.dtype.kind == 'f':
+        hi = float(cost.max())
+        dtype, INF = np.float64, np.inf
+    elif cost.dtype.kind in 'iub':
+        hi = int(cost.max())
+        dtype = np.int32 if (hi + 1) * m * n < 2**30 else np.int64
+        INF = np.iinfo(dtype).max // 2
+    else:
+        raise TypeError(f"grid costs must be integer or float, got dtype {cost.dtype}")
+    W = n + 2
+    c = np.zeros((m+2, W), dtype=dtype)
+    c[1:-1, 1:-1] = cost
+    c = c.ravel()
+    dist = np.zeros((m+2, W), dtype=dtype)
+    dist[1:-1, 1:-1] = INF
+    dist = dist.ravel()
+    src = W + 1
+    dist[src] = c[src]
+    if delta is None:
+        delta = max(1, 2*hi)
+    offs = np.array([1, -1, W, -W], dtype=np.intp)
+    stamp = np.empty(dist.size, dtype=np.intp)
+    pending = np.array([src], dtype=np.intp)
+    while pending.size:
+        pd = dist[pending]
+        bound = (pd.min().item() // delta + 1) * delta
+        inb = pd < bound
+        frontier = pending[inb]
+        spill = [pending[~inb]]
+        while frontier.size:
+            nb = (frontier[:, None] + offs).ravel()
+            nd = (dist[frontier][:, None] + c[nb].reshape(-1, 4)).ravel()
+            better = nd < dist[nb]
+            nb, nd = nb[better], nd[better]
+            np.minimum.at(dist, nb, nd)
+            won = dist[nb] == nd
+            nb, nd = nb[won], nd[won]
+            inb = nd < bound
+            frontier = nb[inb]
+            spill.append(nb[~inb])
+        pending = np.concatenate(spill)
+        # drop duplicates without sorting: keep the last occurrence of each cell
+        pos = np.arange(pending.size)
+        stamp[pending] = pos
+        pending = pending[stamp[pending] == pos]
+    field = dist.reshape(m+2, W)[1:-1, 1:-1]
+    result = field[m-1, n-1].item()
+    return (result, field.copy()) if return_dist else result
+
+
 def test_min_cost_path() -> None:
     """Basic tests for min_cost_path function"""
     
@@ -86,6 +376,179 @@ def test_min_cost_path() -> None:
     print("All tests passed!")
 
 
+def test_min_cost_path_search() -> None:
+    """Every search mode must return the same cost as min_cost_path"""
+    import random
+    random.seed(7)
+    grids = [[[1, 3], [1, 5]], [[5]], [[1, 100], [1, 1]], [[0, 0], [0, 0]], [[1, 2, 3]]]
+    for _ in range(50):
+        m, n = random.randint(1, 12), random.randint(1, 12)
+        grids.append([[random.randint(0, 9) for _ in range(n)] for _ in range(m)])
+    for grid in grids:
+        expected = min_cost_path(grid)
+        for mode in ("dijkstra", "astar", "bidirectional"):
+            for queue in QUEUE_KINDS + ("auto",):
+                result, _ = min_cost_path_search(grid, mode, queue)
+                assert result == expected, f"{mode}/{queue} failed on {grid}: expected {expected}, got {result}"
+    for _ in range(100):  # float costs: only queues that take non-integer keys
+        m, n = random.randint(1, 12), random.randint(1, 12)
+        grid = [[random.choice((0.1, 0.2, 0.3, 0.7, 1.1)) for _ in range(n)] for _ in range(m)]
+        expected = min_cost_path(grid)
+        for mode in ("dijkstra", "astar", "bidirectional"):
+            for queue in ("heapq", "indexed", "auto"):
+                result, _ = min_cost_path_search(grid, mode, queue)
+                assert math.isclose(result, expected), f"{mode}/{queue} failed on {grid}: expected {expected}, got {result}"
+    print("All search modes and queues agree with min_cost_path")
+    for grid in grids:
+        m, n = len(grid), len(grid[0])
+        cost, dirs = min_cost_path_route(grid)
+        path = list(grid_path(dirs, n, (m-1, n-1)))[::-1]
+        assert path[0] == (0, 0) and sum(grid[r][c] for r, c in path) == cost
+        assert all(abs(r1-r2) + abs(c1-c2) == 1 for (r1, c1), (r2, c2) in zip(path, path[1:]))
+    print("Routes from min_cost_path_route add up to the returned cost")
+
+
+def test_min_cost_path_numpy() -> None:
+    """The vectorized engine must agree with min_cost_path"""
+    try:
+        import numpy as np
+    except ImportError:
+        print("numpy not installed, skipping min_cost_path_numpy tests")
+        return
+    import random
+    random.seed(11)
+    grids = [[[1, 3], [1, 5]], [[1, 1, 1], [1, 2, 1], [1, 1, 1]], [[5]],
+             [[1, 4, 3], [1, 1, 1], [4, 2, 1]], [[1, 100], [1, 1]], [[0, 0], [0, 0]]]
+    for _ in range(50):
+        m, n = random.randint(1, 15), random.randint(1, 15)
+        grids.append([[random.randint(0, 255) for _ in range(n)] for _ in range(m)])
+    for grid in grids:
+        expected = min_cost_path(grid)
+        result, field = min_cost_path_numpy(grid, return_dist=True)
+        assert result == expected, f"numpy engine failed on {grid}: expected {expected}, got {result}"
+        assert field.shape == (len(grid), len(grid[0])) and field[0, 0] == grid[0][0]
+    assert min_cost_path_numpy(np.array(grids[3])) == 5
+    assert min_cost_path_numpy([[1.5, 2.5], [1, 1]]) == min_cost_path([[1.5, 2.5], [1, 1]]) == 3.5
+    for _ in range(20):
+        m, n = random.randint(1, 12), random.randint(1, 12)
+        grid = [[random.choice((0.25, 0.5, 1.75, 3.0, 10.5)) for _ in range(n)] for _ in range(m)]
+        assert min_cost_path_numpy(np.array(grid)) == min_cost_path(grid), grid
+    try:
+        min_cost_path_numpy(np.array([[1j]]))
+        assert False, "complex grid accepted"
+    except TypeError:
+        pass
+    print("min_cost_path_numpy agrees with min_cost_path")
+
+
+def compare_numpy_engine(size: int = 2000) -> None:
+    """Time min_cost_path against the vectorized engine on a random raster"""
+    import time
+    try:
+        import numpy as np
+    except ImportError:
+        print("numpy not installed, skipping benchmark")
+        return
+    grid = np.random.default_rng(0).integers(1, 256, (size, size))
+    rows = grid.tolist()
+    start = time.perf_counter()
+    expected = min_cost_path(rows)
+    t_ref = time.perf_counter() - start
+    start = time.perf_counter()
+    result = min_cost_path_numpy(grid)
+    t_np = time.perf_counter() - start
+    assert result == expected
+    print(f"{size}x{size}: min_cost_path {t_ref:.2f}s, min_cost_path_numpy {t_np:.2f}s ({t_ref / t_np:.1f}x)")
+
+
+def test_grid_router() -> None:
+    """GridRouter must track min_cost_path through a series of patch updates"""
+    import random
+    random.seed(5)
+    for _ in range(20):
+        m, n = random.randint(1, 20), random.randint(1, 20)
+        grid = [[random.randint(1, 20) for _ in range(n)] for _ in range(m)]
+        router = GridRouter(grid)
+        assert router.cost() == min_cost_path(grid)
+        for _ in range(10):
+            patch = [(random.randrange(m), random.randrange(n), random.randint(0, 30)) for _ in range(5)]
+            for r, c, cost in patch:
+                grid[r][c] = cost
+            router.update_cells(patch)
+            expected = min_cost_path(grid)
+            result = router.cost()
+            assert result == expected, f"GridRouter failed after {patch}: expected {expected}, got {result}"
+    grid = [[random.randint(1, 20) for _ in range(60)] for _ in range(60)]
+    router = GridRouter(grid)
+    router.cost()
+    for _ in range(300):
+        patch = [(random.randrange(60), random.randrange(60), random.randint(0, 30)) for _ in range(20)]
+        for r, c, cost in patch:
+            grid[r][c] = cost
+        router.update_cells(patch)
+        router.cost()
+        assert len(router.pq) <= GridRouter.COMPACT * 3600, len(router.pq)
+    assert router.cost() == min_cost_path(grid)
+    for bad in (lambda: GridRouter([[1, 2.5]]), lambda: GridRouter([[1, 2]]).update_cells([(0, 0, 0.5)])):
+        try:
+            bad()
+            assert False, "float cost accepted"
+        except TypeError:
+            pass
+    print("GridRouter matches min_cost_path after every update")
+
+
+def compare_grid_router(size: int = 200, patches: int = 10, patch_cells: int = 100) -> None:
+    """Cells expanded by a full search vs by GridRouter repairs after small patches"""
+    import random, time
+    random.seed(4)
+    grid = [[random.randint(1, 255) for _ in range(size)] for _ in range(size)]
+    router = GridRouter(grid)
+    router.cost()
+    print(f"initial GridRouter search expanded {router.expanded} cells")
+    for _ in range(patches):
+        r0, c0 = random.randrange(size - 10), random.randrange(size - 10)
+        patch = [(r0 + random.randrange(10), c0 + random.randrange(10), random.randint(1, 255))
+                 for _ in range(patch_cells)]
+        for r, c, cost in patch:
+            grid[r][c] = cost
+        start = time.perf_counter()
+        full, settled = min_cost_path_search(grid)
+        t_full = time.perf_counter() - start
+        start = time.perf_counter()
+        router.update_cells(patch)
+        result = router.cost()
+        t_inc = time.perf_counter() - start
+        assert result == full
+        print(f"full: {settled} settled in {t_full:.3f}s, repair: {router.expanded} expanded in {t_inc:.3f}s")
+
+
+def compare_search_modes(size: int = 200) -> None:
+    """Report settled cells per search mode on a random cost raster"""
+    import random, time
+    random.seed(1)
+    grid = [[random.randint(1, 255) for _ in range(size)] for _ in range(size)]
+    for mode in ("dijkstra", "astar", "bidirectional"):
+        for queue in QUEUE_KINDS:
+            start = time.perf_counter()
+            cost, settled = min_cost_path_search(grid, mode, queue)
+            elapsed = time.perf_counter() - start
+            print(f"{mode:>13}/{queue:<7}: cost={cost} settled={settled} ({settled / size**2:.0%}) in {elapsed:.3f}s")
+
+
+def compare_lazy_vs_decrease_key(size: int = 200) -> None:
+    """Peak queue size and pops for lazy deletion vs an indexed decrease-key heap"""
+    import random, time
+    from algorithm_templates import HeapQueue, IndexedHeap
+    random.seed(2)
+    grid = [[random.randint(1, 255) for _ in range(size)] for _ in range(size)]
+    for name, pq in (("lazy heapq", HeapQueue()), ("decrease-key", IndexedHeap(size*size))):
+        start = time.perf_counter()
+        cost, settled = min_cost_path_search(grid, "dijkstra", pq)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12}: cost={cost} settled={settled} pops={pq.pops} peak={pq.peak} in {elapsed:.3f}s")
+
+
 def min_cost_path_unoptimized(grid: List[List[int]]) -> int:
     """Version without the stale entry check for comparison"""
     m, n = len(grid), len(grid[0])
@@ -320,3 +783,10 @@ if __name__ == "__main__":
     compare_performance()
     print("\n" + "="*50 + "\n")
     test_min_cost_path()
+    test_min_cost_path_search()
+    compare_search_modes()
+    compare_lazy_vs_decrease_key()
+    test_grid_router()
+    compare_grid_router()
+    test_min_cost_path_numpy()
+    compare_numpy_engine(500)
@@ -5,21 +5,24 @@ This creates a scenario that will definitely show the difference.
 
 from heapq import heappush, heappop
 from typing import List
+from algorithm_templates import make_queue
 
-def dijkstra_with_stale_check(grid: List[List[int]]) -> tuple[int, int, int]:
-    """Dijkstra with stale entry optimization"""
+def dijkstra_with_stale_check(grid: List[List[int]], queue="heapq") -> tuple[int, int, int]:
+    """Dijkstra with stale entry optimization; queue is any make_queue kind"""
     m, n = len(grid), len(grid[0])
     INF = 10**18
     dist = [[INF]*n for _ in range(m)]
     dist[0][0] = grid[0][0]
-    pq = [(grid[0][0], 0, 0)]
+    pq = make_queue(queue, max(max(row) for row in grid), m*n)
+    pq.push(grid[0][0], 0)
     DIRS = [(1,0),(-1,0),(0,1),(0,-1)]
     
     processed = 0
     total_popped = 0
     
     while pq:
-        d, r, c = heappop(pq)
+        d, cell = pq.pop()
+        r, c = divmod(cell, n)
         total_popped += 1
         
         # THE OPTIMIZATION: Skip stale entries
@@ -37,7 +40,7 @@ def dijkstra_with_stale_check(grid: List[List[int]]) -> tuple[int, int, int]:
                 nd = d + grid[nr][nc]
                 if nd < dist[nr][nc]:
                     dist[nr][nc] = nd
-                    heappush(pq, (nd, nr, nc))
+                    pq.push(nd, nr*n + nc)
     return -1, processed, total_popped
 
 
@@ -180,6 +183,14 @@ def main():
     print(f"Stale entries saved: {processed2_no_opt - processed2_opt}")
     print()
     
+    # Test 3: Same search with each priority queue strategy
+    print("Test 3: Priority queue strategies on the spider web grid")
+    for queue in ("heapq", "bucket", "radix", "indexed"):
+        result3, processed3, total3 = dijkstra_with_stale_check(grid2, queue)
+        assert result3 == result2_opt, f"{queue} queue returned {result3}, expected {result2_opt}"
+        print(f"{queue:>7}: Result={result3}, Processed={processed3}, Total popped={total3}")
+    print()
+    
     if processed1_no_opt > processed1_opt or processed2_no_opt > processed2_opt:
         print("SUCCESS: The optimization makes a difference!")
     else:
@@ -3,40 +3,296 @@
 #Given n tasks 0..n-1, directed edges u->v (u must precede v), and time[i] for each task, compute the minimum total time to finish all tasks if you can run multiple tasks in parallel when prerequisites are done. If there’s a cycle, return -1.
 
 #Idea: Kahn’s toposort; DP the earliest finish ef[i] = time[i] + max(ef[p] for p in preds(i)).
+#The max is pushed forward along each edge as u is popped, so preds are never stored or rescanned.
 
 #Solution (O(n+e))
 
+import os
+import tempfile
 from collections import deque
+from heapq import heapify, heappush, heappop
+from algorithm_templates import CSRGraph, external_csr
 
 def min_total_time(n, edges, time):
-    g = [[] for _ in range(n)]
+    # edges: list of (u, v) pairs, or a CSRGraph (e.g. CSRGraph.open on a saved graph file)
     indeg = [0]*n
-    preds = [[] for _ in range(n)]
-    for u,v in edges:
-        g[u].append(v)
-        preds[v].append(u)
-        indeg[v]+=1
+    if isinstance(edges, CSRGraph):
+        succ = edges.successors
+        for v in edges.targets:
+            indeg[v]+=1
+    else:
+        g = [[] for _ in range(n)]
+        for u,v in edges:
+            g[u].append(v)
+            indeg[v]+=1
+        succ = g.__getitem__
 
     q = deque([i for i in range(n) if indeg[i]==0])
-    order = []
+    ef = [0]*n  # holds max ef of finished preds until u is popped
+    done = 0
     while q:
         u = q.popleft()
-        order.append(u)
-        for v in g[u]:
+        done += 1
+        ef[u] += time[u]
+        for v in succ(u):
+            if ef[u] > ef[v]:
+                ef[v] = ef[u]
             indeg[v]-=1
             if indeg[v]==0:
                 q.append(v)
 
+    if done != n:
+        return -1
+    return max(ef) if ef else 0
+
+
+#List scheduling with P workers.
+#Priority is the bottom level bl[u] = time[u] + max(bl[v] for v in succ(u)), i.e. the
+#critical path still ahead of u. Whenever a worker is free, the ready task with the
+#largest bl starts. Returns (start, makespan), or -1 if there is a cycle.
+#O((n+e) log n)
+
+def list_schedule(n, edges, time, workers):
+    if workers < 1:
+        raise ValueError("need at least one worker")
+    indeg = [0]*n
+    if isinstance(edges, CSRGraph):
+        succ = edges.successors
+        for v in edges.targets:
+            indeg[v]+=1
+    else:
+        g = [[] for _ in range(n)]
+        for u,v in edges:
+            g[u].append(v)
+            indeg[v]+=1
+        succ = g.__getitem__
+
+    left = indeg[:]
+    q = deque([i for i in range(n) if indeg[i]==0])
+    order = []
+    while q:
+        u = q.popleft()
+        order.append(u)
+        for v in succ(u):
+            left[v]-=1
+            if left[v]==0:
+                q.append(v)
     if len(order) != n:
         return -1
 
-    ef = [0]*n
-    for u in order:
-        if preds[u]:
-            ef[u] = time[u] + max(ef[p] for p in preds[u])
-        else:
-            ef[u] = time[u]
-    return max(ef) if ef else 0
+    bl = [0]*n
+    for u in reversed(order):
+        bl[u] = time[u] + max((bl[v] for v in succ(u)), default=0)
+
+    start = [0]*n
+    ready = [(-bl[u], u) for u in range(n) if indeg[u]==0]
+    ready.sort()
+    running = []  # (finish, task)
+    free, now, makespan = workers, 0, 0
+    while ready or running:
+        while ready and free:
+            _, u = heappop(ready)
+            start[u] = now
+            heappush(running, (now + time[u], u))
+            free -= 1
+        now = running[0][0]
+        while running and running[0][0] == now:
+            _, u = heappop(running)
+            free += 1
+            makespan = now
+            for v in succ(u):
+                indeg[v]-=1
+                if indeg[v]==0:
+                    heappush(ready, (-bl[v], v))
+    return start, makespan
+
+
+#Online topological order under edge insertions (Pearce-Kelly).
+#Adding u->v with ord[u] < ord[v] costs O(1). Otherwise only the "affected region"
+#between ord[v] and ord[u] is searched: nodes reachable from v (forward) and nodes
+#reaching u (backward) are re-slotted into the same set of positions, backward ones
+#first. Reaching u from v means the edge would close a cycle, so it is rejected.
+#Earliest finish times only grow under insertions and are pushed forward in
+#topological order from v, touching only descendants whose ef changes.
+
+class DynamicTopo:
+    def __init__(self, n, time=None):
+        self.n = n
+        self.ord = list(range(n))    # node -> position
+        self.node = list(range(n))   # position -> node
+        self.succ = [[] for _ in range(n)]
+        self.pred = [[] for _ in range(n)]
+        self.time = list(time) if time is not None else [0]*n
+        self.ef = self.time[:]
+        self.makespan = max(self.ef, default=0)
+
+    def add_edge(self, u, v):
+        """Insert u->v; returns False (and leaves the graph unchanged) on a cycle."""
+        if u == v:
+            return False
+        ord_ = self.ord
+        lb, ub = ord_[v], ord_[u]
+        if lb < ub:
+            fwd = self._reach(v, self.succ, lambda x: ord_[x] <= ub, u)
+            if fwd is None:
+                return False
+            back = self._reach(u, self.pred, lambda x: ord_[x] >= lb, None)
+            fwd.sort(key=ord_.__getitem__)
+            back.sort(key=ord_.__getitem__)
+            slots = sorted(ord_[x] for x in back + fwd)
+            for x, p in zip(back + fwd, slots):
+                ord_[x] = p
+                self.node[p] = x
+        self.succ[u].append(v)
+        self.pred[v].append(u)
+        self._push_ef(u, v)
+        return True
+
+    def _reach(self, start, adj, inside, forbidden):
+        """Nodes reachable from start through adj restricted to inside(); None if forbidden is hit."""
+        seen, stack = {start}, [start]
+        while stack:
+            x = stack.pop()
+            for y in adj[x]:
+                if y == forbidden:
+                    return None
+                if y not in seen and inside(y):
+                    seen.add(y)
+                    stack.append(y)
+        return list(seen)
+
+    def _push_ef(self, u, v):
+        ef, time, ord_ = self.ef, self.time, self.ord
+        if ef[u] + time[v] <= ef[v]:
+            return
+        ef[v] = ef[u] + time[v]
+        heap = [(ord_[v], v)]
+        while heap:
+            _, x = heappop(heap)
+            self.makespan = max(self.makespan, ef[x])
+            for y in self.succ[x]:
+                if ef[x] + time[y] > ef[y]:
+                    ef[y] = ef[x] + time[y]
+                    heappush(heap, (ord_[y], y))
+
+    def order(self):
+        return self.node[:]
+
+
+#Critical path under changing durations.
+#ef[u] = time[u] + max ef of preds (earliest finish) and tail[u] = time[u] + max tail
+#of succs (longest path from u to the end). latest_start[u] = makespan - tail[u] and
+#slack[u] = latest_start[u] - (ef[u] - time[u]). Changing time[i] re-evaluates ef
+#only for descendants (in topological order) and tail only for ancestors (in reverse
+#order), stopping wherever a value does not change.
+
+class CriticalPathScheduler:
+    def __init__(self, n, edges, time):
+        self.n = n
+        self.time = list(time)
+        self.succ = [[] for _ in range(n)]
+        self.pred = [[] for _ in range(n)]
+        for u,v in edges:
+            self.succ[u].append(v)
+            self.pred[v].append(u)
+        indeg = [len(p) for p in self.pred]
+        q = deque([i for i in range(n) if indeg[i]==0])
+        order = []
+        while q:
+            u = q.popleft()
+            order.append(u)
+            for v in self.succ[u]:
+                indeg[v]-=1
+                if indeg[v]==0:
+                    q.append(v)
+        if len(order) != n:
+            raise ValueError("task graph has a cycle")
+        self.ord = [0]*n
+        for i, u in enumerate(order):
+            self.ord[u] = i
+        self.ef = [0]*n
+        for u in order:
+            self.ef[u] = self._ef(u)
+        self.tail = [0]*n
+        for u in reversed(order):
+            self.tail[u] = self._tail(u)
+        self._top = [(-self.ef[u], u) for u in range(n)]  # lazy max-heap of ef
+        self._top.sort()
+
+    def _ef(self, u):
+        return self.time[u] + max((self.ef[p] for p in self.pred[u]), default=0)
+
+    def _tail(self, u):
+        return self.time[u] + max((self.tail[s] for s in self.succ[u]), default=0)
+
+    @property
+    def makespan(self):
+        top = self._top
+        while top and -top[0][0] != self.ef[top[0][1]]:
+            heappop(top)  # stale entry from before an ef change
+        return -top[0][0] if top else 0
+
+    def latest_start(self, u):
+        return self.makespan - self.tail[u]
+
+    def slack(self, u):
+        return self.latest_start(u) - (self.ef[u] - self.time[u])
+
+    def update_duration(self, i, t):
+        if t == self.time[i]:
+            return
+        self.time[i] = t
+        ord_, ef, tail = self.ord, self.ef, self.tail
+        heap = [(ord_[i], i)]
+        queued = {i}
+        while heap:
+            _, u = heappop(heap)
+            new = self._ef(u)
+            if new != ef[u] or u == i:
+                ef[u] = new
+                heappush(self._top, (-new, u))
+                for v in self.succ[u]:
+                    if v not in queued:
+                        queued.add(v)
+                        heappush(heap, (ord_[v], v))
+        heap = [(-ord_[i], i)]
+        queued = {i}
+        while heap:
+            _, u = heappop(heap)
+            new = self._tail(u)
+            if new != tail[u] or u == i:
+                tail[u] = new
+                for p in self.pred[u]:
+                    if p not in queued:
+                        queued.add(p)
+                        heappush(heap, (-ord_[p], p))
+        if len(self._top) > 2*self.n:
+            # stale entries only leave from the top, so rebuild before they pile up
+            self._top = [(-ef[u], u) for u in range(self.n)]
+            heapify(self._top)
+
+    def critical_path(self):
+        """Tasks on one longest path, first to last."""
+        if not self.n:
+            return []
+        self.makespan  # drops stale entries, so the heap top is a task finishing last
+        u = self._top[0][1]
+        path = [u]
+        while self.pred[u]:
+            start = self.ef[u] - self.time[u]
+            u = next(p for p in self.pred[u] if self.ef[p] == start)
+            path.append(u)
+        return path[::-1]
+
+
+def min_total_time_stream(n, edges, time, budget_edges=1<<20, tmpdir=None):
+    # edges: iterable of (u, v) or a "u v" per line file; the adjacency is spilled to disk
+    with tempfile.TemporaryDirectory(dir=tmpdir) as tmp:
+        g = external_csr(n, edges, os.path.join(tmp, 'edges.csr'), budget_edges)
+        try:
+            return min_total_time(n, g, time)
+        finally:
+            g.close()
 
 
 def test_min_total_time():
@@ -139,8 +395,171 @@ def test_min_total_time():
     assert result10 == expected10, f"Test 10 failed: expected {expected10}, got {result10}"
     print(f"Test 10 passed: {result10}")
     
+    # Test 11: CSR input gives the same answers as edge lists
+    for n, edges, time, expected in [(n3, edges3, time3, expected3), (n4, edges4, time4, expected4),
+                                     (n6, edges6, time6, expected6), (n7, edges7, time7, expected7)]:
+        result11 = min_total_time(n, CSRGraph.from_edges(n, edges), time)
+        assert result11 == expected, f"Test 11 failed: expected {expected}, got {result11}"
+    print("Test 11 passed")
+    
+    # Test 12: Streaming mode with a tiny memory budget gives the same answers
+    for n, edges, time, expected in [(n3, edges3, time3, expected3), (n4, edges4, time4, expected4),
+                                     (n6, edges6, time6, expected6), (n10, edges10, time10, expected10)]:
+        result12 = min_total_time_stream(n, iter(edges), time, budget_edges=2)
+        assert result12 == expected, f"Test 12 failed: expected {expected}, got {result12}"
+    print("Test 12 passed")
+    
     print("All tests passed!")
 
 
+def test_list_schedule():
+    """list_schedule must respect precedence and the worker limit"""
+    import random
+    random.seed(21)
+    assert list_schedule(3, [(0, 1), (1, 2), (2, 0)], [1, 1, 1], 2) == -1
+    assert list_schedule(0, [], [], 1) == ([], 0)
+    for _ in range(200):
+        n = random.randint(1, 30)
+        edges = [(u, v) for u in range(n) for v in range(u+1, n) if random.random() < 0.1]
+        time = [random.randint(0, 9) for _ in range(n)]
+        workers = random.randint(1, 4)
+        start, makespan = list_schedule(n, edges, time, workers)
+        for u, v in edges:
+            assert start[u] + time[u] <= start[v], f"task {v} starts before {u} finishes"
+        events = sorted([(start[u], 1) for u in range(n) if time[u]] + [(start[u] + time[u], -1) for u in range(n) if time[u]],
+                        key=lambda e: (e[0], e[1]))
+        busy = 0
+        for _, delta in events:
+            busy += delta
+            assert busy <= workers, "more tasks running than workers"
+        assert makespan == max((start[u] + time[u] for u in range(n)), default=0)
+        assert makespan >= min_total_time(n, edges, time)
+        if workers == 1:
+            assert makespan == sum(time)
+        assert list_schedule(n, edges, time, n)[1] == min_total_time(n, edges, time)
+    print("All list_schedule tests passed!")
+
+
+def test_dynamic_topo():
+    """DynamicTopo must reject exactly the cycle-closing edges and track min_total_time"""
+    import random
+    random.seed(8)
+    for _ in range(100):
+        n = random.randint(1, 15)
+        time = [random.randint(0, 9) for _ in range(n)]
+        dt = DynamicTopo(n, time)
+        accepted = []
+        for _ in range(40):
+            u, v = random.randrange(n), random.randrange(n)
+            creates_cycle = min_total_time(n, accepted + [(u, v)], time) == -1
+            assert dt.add_edge(u, v) == (not creates_cycle), f"edge {(u, v)} after {accepted}"
+            if not creates_cycle:
+                accepted.append((u, v))
+            order = dt.order()
+            assert sorted(order) == list(range(n))
+            assert all(dt.ord[a] < dt.ord[b] for a, b in accepted)
+            assert dt.makespan == min_total_time(n, accepted, time)
+    print("All DynamicTopo tests passed!")
+
+
+def benchmark_dynamic_topo(n=20_000, inserts=40_000):
+    """Average DynamicTopo.add_edge time against one full min_total_time run"""
+    import random, time as clock
+    rng = random.Random(5)
+    durations = [rng.randint(1, 100) for _ in range(n)]
+    dt = DynamicTopo(n, durations)
+    accepted = []
+    start = clock.perf_counter()
+    for _ in range(inserts):
+        u = rng.randrange(n - 1)
+        v = min(n - 1, u + rng.randint(1, 50)) if rng.random() < 0.9 else rng.randrange(n)
+        if dt.add_edge(u, v):
+            accepted.append((u, v))
+    per_insert = (clock.perf_counter() - start) / inserts
+    start = clock.perf_counter()
+    assert min_total_time(n, accepted, durations) == dt.makespan
+    full = clock.perf_counter() - start
+    print(f"{n} tasks, {len(accepted)} edges: add_edge {1e6 * per_insert:.1f} us, "
+          f"full recompute {1e3 * full:.1f} ms")
+
+
+def test_critical_path_scheduler():
+    """Incremental updates must match a scheduler rebuilt from scratch"""
+    import random
+    random.seed(31)
+    for _ in range(100):
+        n = random.randint(1, 20)
+        edges = [(u, v) for u in range(n) for v in range(u+1, n) if random.random() < 0.15]
+        perm = list(range(n))
+        random.shuffle(perm)
+        edges = [(perm[u], perm[v]) for u, v in edges]
+        time = [random.randint(0, 9) for _ in range(n)]
+        cps = CriticalPathScheduler(n, edges, time)
+        for _ in range(20):
+            i, t = random.randrange(n), random.randint(0, 12)
+            time[i] = t
+            cps.update_duration(i, t)
+            fresh = CriticalPathScheduler(n, edges, time)
+            assert cps.makespan == fresh.makespan == min_total_time(n, edges, time)
+            assert cps.ef == fresh.ef and cps.tail == fresh.tail
+            assert [cps.slack(u) for u in range(n)] == [fresh.slack(u) for u in range(n)]
+            path = cps.critical_path()
+            assert sum(time[u] for u in path) == cps.makespan
+            assert all(cps.slack(u) == 0 for u in path)
+            assert all((a, b) in edges for a, b in zip(path, path[1:]))
+    try:
+        CriticalPathScheduler(2, [(0, 1), (1, 0)], [1, 1])
+        assert False, "cycle not detected"
+    except ValueError:
+        pass
+    chain_edges = [(u, u+1) for u in range(199)]
+    chain = CriticalPathScheduler(200, chain_edges, [1]*200)
+    for k in range(2000):  # every update moves ef of most of the chain
+        chain.update_duration(k % 7, k % 5 + 1)
+    assert len(chain._top) <= 2*200 and chain.makespan == min_total_time(200, chain_edges, chain.time)
+    print("All CriticalPathScheduler tests passed!")
+
+
+def benchmark_critical_path_scheduler(n=100_000, updates=1000):
+    """Average update_duration latency against a full min_total_time run"""
+    import random, time as clock
+    rng = random.Random(6)
+    edges = [(u, min(n - 1, u + rng.randint(1, 1000))) for u in range(n - 1) for _ in range(2)]
+    durations = [rng.randint(1, 100) for _ in range(n)]
+    cps = CriticalPathScheduler(n, edges, durations)
+    start = clock.perf_counter()
+    for _ in range(updates):
+        i = rng.randrange(n)
+        durations[i] = max(1, durations[i] + rng.randint(-5, 5))
+        cps.update_duration(i, durations[i])
+    per_update = (clock.perf_counter() - start) / updates
+    start = clock.perf_counter()
+    assert min_total_time(n, edges, durations) == cps.makespan
+    full = clock.perf_counter() - start
+    print(f"{n} tasks: update_duration {1e3 * per_update:.2f} ms, full recompute {1e3 * full:.0f} ms")
+
+
+def benchmark_list_schedule(n=1_000_000, workers=64):
+    """Time list_schedule on a random layered DAG with about 3 edges per task"""
+    import random, time as clock
+    rng = random.Random(0)
+    width = 1000
+    edges = [(u, rng.randrange((u // width + 1) * width, min(n, (u // width + 2) * width)))
+             for u in range(n - width) for _ in range(3)]
+    durations = [rng.randint(1, 100) for _ in range(n)]
+    g = CSRGraph.from_edges(n, edges)
+    start = clock.perf_counter()
+    _, makespan = list_schedule(n, g, durations, workers)
+    elapsed = clock.perf_counter() - start
+    print(f"{n} tasks, {len(edges)} edges, {workers} workers: makespan {makespan}, "
+          f"critical path {min_total_time(n, g, durations)}, scheduled in {elapsed:.2f}s")
+
+
 if __name__ == "__main__":
     test_min_total_time()
+    test_list_schedule()
+    test_dynamic_topo()
+    benchmark_dynamic_topo()
+    test_critical_path_scheduler()
+    benchmark_critical_path_scheduler()
+    benchmark_list_schedule(100_000)